@@ -0,0 +1,233 @@
+import json
+import os
+
+import numpy as np
+
+from file_reader import CHUNK_SIZE, iter_link_chunks, read_page_ids
+
+
+# the most links held in memory at a time while ranking
+LINKS_PER_CHUNK = 1 << 22
+
+
+class BlockedLinkStore:
+    """
+    The links of an InternetGraph too large to fit in memory, kept on disk
+    and ranked a piece at a time. The pages are split into B blocks of
+    consecutive indices, and the links are split into B x B partitions by
+    the blocks of the pages they start and end at, each in its own file.
+
+    Ranking streams the partitions through memory one at a time, so only
+    vectors with one value per page (the rankings and out-degrees) stay
+    in memory, never the links themselves.
+
+    """
+    def __init__(self, directory):
+        """Open a BlockedLinkStore that was saved in a directory.
+
+           Parameters:
+           directory(str): the directory from_file wrote the store to
+
+           Returns: None
+
+        """
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        self.num_pages = meta['num_pages']
+        self.num_blocks = meta['num_blocks']
+        self.block_size = meta['block_size']
+        # the number of outlinks of each page
+        self.out_degrees = np.load(os.path.join(directory, 'out_degrees.npy'))
+        # how the last ranking converged
+        self.rank_iterations = 0
+        self.rank_residual = None
+
+    @classmethod
+    def from_file(cls, filename, directory, num_blocks=16,
+                  chunk_size=CHUNK_SIZE, progress=None):
+        """Split the links in a file, in the format read_internet_graph
+           reads, into partitions saved in a directory.
+
+           Parameters:
+           filename(str): the path of the file of links
+           directory(str): where to save the partitions. It is created
+                           if it doesn't exist.
+           num_blocks(int): B, the number of blocks to split the pages
+                            into. Each partition holds about L / B^2
+                            links, and must fit in memory.
+           chunk_size(int): the number of bytes of links to read at a time
+           progress(function): if given, called as
+                               progress(bytes_read, total_bytes) after
+                               each chunk of links is read
+
+           Returns: BlockedLinkStore: the store, opened from directory
+
+           Complexity Analysis:
+           The file is read once, a chunk at a time, and each chunk is
+           split among the partitions with a sort, in O(L log L) time
+           overall. Each partition is then read back once to drop any
+           repeated links, which only ever repeat within a partition.
+
+        """
+        os.makedirs(directory, exist_ok=True)
+        # partitions are appended to, so clear out any from before
+        for name in os.listdir(directory):
+            if name.startswith('links_') and name.endswith('.bin'):
+                os.remove(os.path.join(directory, name))
+        with open(filename, 'rb') as f:
+            page_ids = list(dict.fromkeys(read_page_ids(f)))
+            page_index = {
+                page_id: index for index, page_id in enumerate(page_ids)
+            }
+            num_pages = len(page_ids)
+            num_blocks = max(min(num_blocks, num_pages), 1)
+            block_size = -(-num_pages // num_blocks)
+            for sources, targets in iter_link_chunks(
+                f, page_index, chunk_size, progress
+            ):
+                # group the links in this chunk by partition
+                partitions = (
+                    (sources // block_size) * num_blocks +
+                    targets // block_size
+                )
+                order = np.argsort(partitions, kind='stable')
+                partitions = partitions[order]
+                links = np.stack((
+                    sources[order] % block_size, targets[order] % block_size
+                ), axis=1).astype(np.int32)
+                found, starts = np.unique(partitions, return_index=True)
+                ends = np.append(starts[1:], len(partitions))
+                for partition, start, end in zip(
+                    found.tolist(), starts.tolist(), ends.tolist()
+                ):
+                    path = _partition_path(directory, *divmod(
+                        partition, num_blocks
+                    ))
+                    with open(path, 'ab') as part:
+                        part.write(links[start:end].tobytes())
+        # drop repeated links, keeping the first, and count the outlinks
+        out_degrees = np.zeros(num_pages, dtype=np.int64)
+        for source_block in range(num_blocks):
+            offset = source_block * block_size
+            for target_block in range(num_blocks):
+                path = _partition_path(directory, source_block, target_block)
+                if not os.path.exists(path):
+                    continue
+                links = np.fromfile(path, dtype=np.int32).reshape(-1, 2)
+                keys = links[:, 0].astype(np.int64) * block_size + links[:, 1]
+                _, first = np.unique(keys, return_index=True)
+                links = links[np.sort(first)]
+                links.tofile(path)
+                out_degrees[offset:offset + block_size] += np.bincount(
+                    links[:, 0], minlength=block_size
+                )[:num_pages - offset]
+        np.save(os.path.join(directory, 'out_degrees.npy'), out_degrees)
+        with open(os.path.join(directory, 'page_ids.txt'), 'w') as f:
+            f.write('\n'.join(page_ids))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({
+                'num_pages': num_pages, 'num_blocks': num_blocks,
+                'block_size': block_size,
+            }, f)
+        return cls(directory)
+
+    def page_ids(self):
+        '''Return the id of each page, in the order of the rankings.'''
+        with open(os.path.join(self.directory, 'page_ids.txt')) as f:
+            return f.read().split('\n')
+
+    def _links(self, source_block, target_block, chunk_links):
+        """Yield the links of a partition, chunk_links at a time, as
+           offsets within the source and target blocks.
+
+        """
+        path = _partition_path(self.directory, source_block, target_block)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        links = np.memmap(path, dtype=np.int32, mode='r').reshape(-1, 2)
+        for start in range(0, len(links), chunk_links):
+            chunk = np.array(links[start:start + chunk_links])
+            yield chunk[:, 0], chunk[:, 1]
+
+    def rank(self, damping_factor=1.0, tolerance=0.0, max_iterations=50,
+             redistribute_dangling=False, initial=None,
+             chunk_links=LINKS_PER_CHUNK):
+        """Return the rankings of every page, streaming the links from
+           disk once per iteration.
+
+           After returning, the number of iterations that were run and
+           the L1 residual of the last one are stored in the
+           rank_iterations and rank_residual attributes.
+
+           Parameters:
+           damping_factor(float): the probability a visitor follows a link
+           tolerance(float): stop iterating once the L1 distance between
+                             two consecutive rankings is less than this
+           max_iterations(int): the most iterations to run
+           redistribute_dangling(bool): share the endorsement of pages
+                                        without outlinks among all pages
+           initial(numpy.ndarray): the rankings to start from. If None,
+                                   every page starts at 1 / P.
+           (see InternetGraph.compute_inlink_values for more detail)
+           chunk_links(int): the most links to hold in memory at a time
+
+           Returns:
+           numpy.ndarray: the rankings, in the order of page_ids(), as
+                          InternetGraph.compute_inlink_values returns them
+
+           Complexity Analysis:
+           Each iteration reads all L links from disk once, and adds up
+           the endorsements one block of target pages at a time, in
+           O(P + L) time and O(P + chunk_links) memory.
+
+        """
+        num_pages, block_size = self.num_pages, self.block_size
+        degrees = self.out_degrees
+        dangling = degrees == 0
+        if initial is None:
+            rankings = np.full(num_pages, 1 / num_pages)
+        else:
+            rankings = np.array(initial, dtype=np.float64)
+        iterations, residual = 0, None
+        while iterations < max_iterations:
+            # the endorsement passed along each outlink of each page
+            shares = np.divide(
+                rankings, degrees, out=np.zeros(num_pages), where=~dangling
+            )
+            next_rankings = np.zeros(num_pages)
+            for target_block in range(self.num_blocks):
+                offset = target_block * block_size
+                received = np.zeros(block_size)
+                for source_block in range(self.num_blocks):
+                    source_shares = shares[source_block * block_size:]
+                    for sources, targets in self._links(
+                        source_block, target_block, chunk_links
+                    ):
+                        received += np.bincount(
+                            targets, weights=source_shares[sources],
+                            minlength=block_size
+                        )
+                next_rankings[offset:offset + block_size] = (
+                    received[:num_pages - offset]
+                )
+            next_rankings *= damping_factor
+            if redistribute_dangling is True:
+                lost = rankings[dangling].sum()
+                next_rankings += damping_factor * lost / num_pages
+            next_rankings += (1 - damping_factor) / num_pages
+            # stop early once the rankings stop changing
+            residual = np.abs(next_rankings - rankings).sum()
+            rankings = next_rankings
+            iterations += 1
+            if residual < tolerance:
+                break
+        self.rank_iterations, self.rank_residual = iterations, residual
+        return rankings
+
+
+def _partition_path(directory, source_block, target_block):
+    '''Return the path of the file of links from one block to another.'''
+    return os.path.join(
+        directory, f'links_{source_block}_{target_block}.bin'
+    )
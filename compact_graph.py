@@ -0,0 +1,543 @@
+from array import array
+
+import numpy as np
+
+
+# the fewest links add_link buffers before merging them into the arrays
+PENDING_LINKS = 1 << 12
+
+
+def _ranges(starts, counts):
+    '''Return the positions starts[i]:starts[i] + counts[i] for each i.'''
+    ends = np.cumsum(counts)
+    return (
+        np.arange(ends[-1] if len(ends) > 0 else 0) +
+        np.repeat(starts - (ends - counts), counts)
+    )
+
+
+class CompactGraph:
+    """
+    Integer-indexed storage for the pages and links of an InternetGraph.
+    Each page id is given a dense index the first time it is seen, and
+    the outlinks of every page are kept in two contiguous NumPy arrays
+    (compressed sparse row form): the outlinks of page i are
+    targets[offsets[i]:offsets[i + 1]], in the order they were added.
+
+    New links are appended to a small buffer. Reading the links of one
+    page also checks the buffer, so the arrays are only rebuilt when
+    the buffer grows large, or the links of every page are needed.
+
+    """
+    def __init__(self):
+        '''Construct a new CompactGraph instance with no pages.'''
+        # map each index --> page id, and each page id --> index
+        self.page_ids = list()
+        self._page_index = dict()
+        # outlinks of each page, by index
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int32)
+        # the weight of each link in targets, if known ahead of time
+        self.weights = None
+        # links added since the arrays were last rebuilt
+        self._new_sources = array('i')
+        self._new_targets = array('i')
+        # graphs backed by a read-only file can't be changed
+        self.read_only = False
+        # the inlinks of each page, built from the outlinks when needed
+        self._inlinks = None
+        # the links in the buffer not already in the arrays, when known
+        self._pending = None
+        # counts the calls that added or removed links
+        self.version = 0
+
+    @classmethod
+    def from_arrays(cls, page_ids, offsets, targets, weights=None,
+                    read_only=False):
+        """Build a CompactGraph around existing adjacency arrays,
+           without copying them.
+
+           Parameters:
+           page_ids(Sequence): the id of the page at each index
+           offsets(numpy.ndarray): P + 1 offsets into targets
+           targets(numpy.ndarray): the outlinks of every page, by source
+           weights(numpy.ndarray): optional weight of each link in targets
+           read_only(bool): if True, pages and links can't be added
+
+           Returns: CompactGraph: a graph using the given arrays
+
+        """
+        graph = cls()
+        graph.page_ids = page_ids
+        # the page_index is built the first time it is needed
+        graph._page_index = None
+        graph.offsets, graph.targets = offsets, targets
+        graph.weights = weights
+        graph.read_only = read_only
+        return graph
+
+    @property
+    def page_index(self):
+        '''Return the dict mapping each page id --> index.'''
+        if self._page_index is None:
+            self._page_index = {
+                page_id: index for index, page_id in enumerate(self.page_ids)
+            }
+        return self._page_index
+
+    def _check_writable(self):
+        '''Raise a RuntimeError if this graph can't be changed.'''
+        if self.read_only is True:
+            raise RuntimeError('This graph is read-only.')
+
+    def __len__(self):
+        '''Return the number of pages in the graph.'''
+        return len(self.page_ids)
+
+    def __contains__(self, page_id):
+        '''Return True if a page has been given this id.'''
+        return page_id in self.page_index
+
+    def add_page(self, page_id):
+        """Give a page id its index, if it does not already have one.
+
+           Parameters:
+           page_id(str): the id of the page
+
+           Returns: int: the index of the page
+
+        """
+        index = self.page_index.get(page_id)
+        if index is None:
+            self._check_writable()
+            index = len(self.page_ids)
+            self.page_index[page_id] = index
+            self.page_ids.append(page_id)
+        return index
+
+    def add_link(self, source, target):
+        """Add a link between two pages, given by their indices.
+
+           Parameters:
+           source(int): the index of the page the link starts at
+           target(int): the index of the page the link ends at
+
+           Returns: None
+
+        """
+        self._check_writable()
+        self._new_sources.append(source)
+        self._new_targets.append(target)
+        self.version += 1
+        # merging costs O(L log L), so wait until the buffer holds
+        # PENDING_LINKS links, or a sixteenth of L if that is more
+        threshold = max(PENDING_LINKS, len(self.targets) // 16)
+        if len(self._new_sources) >= threshold:
+            self.compact()
+        return None
+
+    def add_links(self, sources, targets):
+        """Add many links at once, given by the indices of their pages.
+
+           Parameters:
+           sources(numpy.ndarray): the index of the page each link starts at
+           targets(numpy.ndarray): the index of the page each link ends at
+
+           Returns: None
+
+        """
+        self._check_writable()
+        self._new_sources.frombytes(np.asarray(sources, dtype='i').tobytes())
+        self._new_targets.frombytes(np.asarray(targets, dtype='i').tobytes())
+        self.version += 1
+        return None
+
+    def compact(self):
+        """Merge any newly added links into the adjacency arrays.
+           A link that was already added before is only kept once.
+
+           Parameters: None
+
+           Returns: None
+
+           Complexity Analysis:
+           Rebuilding the arrays sorts all L links, so this runs in
+           O(P + L log L) whenever there are new links to merge, and
+           O(1) otherwise.
+
+        """
+        num_pages = len(self.page_ids)
+        if len(self._new_sources) == 0:
+            # pages may have been added without any links
+            if len(self.offsets) <= num_pages:
+                missing = num_pages + 1 - len(self.offsets)
+                self.offsets = np.append(
+                    self.offsets, np.full(missing, self.offsets[-1])
+                )
+            return None
+        # list every link as a (source, target) pair
+        degrees = np.diff(self.offsets)
+        sources = np.concatenate((
+            np.repeat(np.arange(len(degrees), dtype=np.int32), degrees),
+            np.frombuffer(self._new_sources, dtype=np.int32)
+        ))
+        targets = np.concatenate((
+            self.targets, np.frombuffer(self._new_targets, dtype=np.int32)
+        ))
+        # keep the first of any repeated links
+        keys = sources.astype(np.int64) * num_pages + targets
+        _, first = np.unique(keys, return_index=True)
+        first.sort()
+        sources, targets = sources[first], targets[first]
+        # group the links by their source, keeping the order they came in
+        order = np.argsort(sources, kind='stable')
+        self.targets = targets[order]
+        self.offsets = np.zeros(num_pages + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(sources, minlength=num_pages), out=self.offsets[1:]
+        )
+        # the links have changed, so any known weights no longer apply
+        self.weights = None
+        self._new_sources = array('i')
+        self._new_targets = array('i')
+        return None
+
+    def remove_links(self, sources, targets):
+        """Remove links between pages, given by the indices of their pages.
+           Links that don't exist are ignored.
+
+           Parameters:
+           sources(numpy.ndarray): the index of the page each link starts at
+           targets(numpy.ndarray): the index of the page each link ends at
+
+           Returns: None
+
+           Complexity Analysis:
+           Only the outlinks of the pages the removed links start at are
+           searched, along with the N links in the buffer, and then the
+           arrays are shifted down over the gaps without being sorted
+           again. This runs in O(P + L + N + R log R) for R links removed.
+
+        """
+        self._check_writable()
+        num_pages = len(self.page_ids)
+        removed = np.unique(
+            np.asarray(sources, dtype=np.int64) * num_pages +
+            np.asarray(targets, dtype=np.int64)
+        )
+        # drop the links from the buffer
+        new_sources = np.frombuffer(self._new_sources, dtype=np.int32)
+        new_targets = np.frombuffer(self._new_targets, dtype=np.int32)
+        kept = ~np.isin(
+            new_sources.astype(np.int64) * num_pages + new_targets, removed
+        )
+        if not kept.all():
+            self._new_sources = array('i', new_sources[kept].tobytes())
+            self._new_targets = array('i', new_targets[kept].tobytes())
+        # and from the arrays, searching just the pages they start at
+        num_stored = len(self.offsets) - 1
+        pages = np.unique(removed // num_pages)
+        pages = pages[pages < num_stored]
+        positions, counts = self._link_positions(pages)
+        keys = (
+            np.repeat(pages, counts) * num_pages + self.targets[positions]
+        )
+        found = np.isin(keys, removed)
+        if found.any():
+            self.targets = np.delete(self.targets, positions[found])
+            losses = np.bincount(
+                np.repeat(pages, counts)[found], minlength=num_stored
+            )
+            self.offsets = self.offsets.copy()
+            self.offsets[1:] -= np.cumsum(losses)
+            self.weights = None
+        self.version += 1
+        return None
+
+    def neighbors(self, index):
+        """Return the indices of the pages linked by a page.
+
+           Parameters:
+           index(int): the index of the page
+
+           Returns: numpy.ndarray: the indices of its outlinks
+
+           Complexity Analysis:
+           The outlinks already in the arrays are a slice of targets, so
+           this runs in O(k) for a page with k outlinks, plus O(N) to
+           search the N links still in the buffer.
+
+        """
+        if len(self._new_sources) == 0:
+            self.compact()
+            return self.targets[self.offsets[index]:self.offsets[index + 1]]
+        if index + 1 < len(self.offsets):
+            stored = self.targets[self.offsets[index]:self.offsets[index + 1]]
+        else:
+            stored = self.targets[:0]
+        # the links of this page waiting in the buffer
+        new_sources = np.frombuffer(self._new_sources, dtype=np.int32)
+        new_targets = np.frombuffer(self._new_targets, dtype=np.int32)
+        added = new_targets[new_sources == index]
+        if len(added) == 0:
+            return stored
+        # keep the first of any repeated links, as compact does
+        links = np.concatenate((stored, added))
+        _, first = np.unique(links, return_index=True)
+        return links[np.sort(first)]
+
+    def neighbors_of_many(self, indices):
+        """Return the outlinks of many pages at once.
+
+           Parameters:
+           indices(numpy.ndarray): the indices of the pages
+
+           Returns:
+           tuple: two numpy.ndarrays, the indices of the pages linked by
+                  each of the pages in turn (in one array), and the number
+                  of outlinks of each page
+
+           Complexity Analysis:
+           The outlinks are gathered from the arrays, and from the links
+           in the buffer (see pending_links), without rebuilding the
+           arrays. This runs in O(M + k log N) for k pages with M outlinks
+           in all, plus the time to read the N buffered links the first
+           time.
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        positions, counts = self._link_positions(indices)
+        new_sources, new_targets = self.pending_links()
+        if len(new_sources) == 0:
+            return self.targets[positions], counts
+        # the buffered links of each page, found among them by source
+        first = np.searchsorted(new_sources, indices, side='left')
+        new_counts = np.searchsorted(new_sources, indices, side='right') - (
+            first
+        )
+        # put each page's new links after those already in the arrays
+        all_counts = counts + new_counts
+        starts = np.cumsum(all_counts) - all_counts
+        links = np.empty(all_counts.sum(), dtype=self.targets.dtype)
+        links[_ranges(starts, counts)] = self.targets[positions]
+        links[_ranges(starts + counts, new_counts)] = (
+            new_targets[_ranges(first, new_counts)]
+        )
+        return links, all_counts
+
+    def sum_over_inlinks(self, values):
+        """Return, for every page, the sum of the values of the pages that
+           link to it, including links still in the buffer.
+
+           Parameters:
+           values(numpy.ndarray): a value for each of the P pages
+
+           Returns: numpy.ndarray: the sum for each page
+
+           Complexity Analysis:
+           Each link adds its page's value once, so this runs in
+           O(P + L + N), plus the time to read the N buffered links the
+           first time.
+
+        """
+        num_pages = len(self.page_ids)
+        degrees = np.diff(self.offsets)
+        sums = np.bincount(
+            self.targets, np.repeat(values[:len(degrees)], degrees),
+            minlength=num_pages
+        )
+        new_sources, new_targets = self.pending_links()
+        if len(new_sources) > 0:
+            sums += np.bincount(
+                new_targets, values[new_sources], minlength=num_pages
+            )
+        return sums
+
+    def _link_positions(self, indices):
+        """Return the position in targets of each outlink of the given
+           pages, in turn, and the number of outlinks of each page in
+           the arrays.
+
+        """
+        # pages added since the arrays were built have no outlinks there
+        num_stored = len(self.offsets) - 1
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.offsets[np.minimum(indices, num_stored)]
+        counts = self.offsets[np.minimum(indices + 1, num_stored)] - starts
+        return _ranges(starts, counts), counts
+
+    def pending_links(self):
+        """Return the links waiting in the buffer that aren't in the
+           arrays yet, keeping the first of any repeated links, as
+           compact does. The result is kept until the links change.
+
+           Parameters: None
+
+           Returns:
+           tuple: two numpy.ndarrays, the index of the page each new
+                  link starts at, and of the page it ends at, grouped
+                  by the page they start at
+
+           Complexity Analysis:
+           Only the stored outlinks of the pages the new links start at
+           are read, so this runs in O(N log N + K) for N links in the
+           buffer, whose pages have K outlinks in the arrays.
+
+        """
+        new_sources = np.frombuffer(self._new_sources, dtype=np.int32)
+        new_targets = np.frombuffer(self._new_targets, dtype=np.int32)
+        if len(new_sources) == 0:
+            return new_sources, new_targets
+        # the links are unchanged if no links were added or removed,
+        # and the buffer wasn't merged into the arrays
+        pending = self._pending
+        if pending is not None and pending[0] == self.version and (
+            pending[1] is self.targets
+        ):
+            return pending[2]
+        num_pages = len(self.page_ids)
+        keys = new_sources.astype(np.int64) * num_pages + new_targets
+        _, first = np.unique(keys, return_index=True)
+        first.sort()
+        sources, targets = new_sources[first], new_targets[first]
+        keys = keys[first]
+        # drop the links the arrays already hold
+        pages = np.unique(sources)
+        positions, counts = self._link_positions(pages)
+        stored = (
+            np.repeat(pages.astype(np.int64), counts) * num_pages +
+            self.targets[positions]
+        )
+        new = np.flatnonzero(~np.isin(keys, stored))
+        new = new[np.argsort(sources[new], kind='stable')]
+        self._pending = (
+            self.version, self.targets, (sources[new], targets[new])
+        )
+        return self._pending[2]
+
+    def inlink_index(self, stored_only=False):
+        """Return the inlinks of every page, grouped by the page they
+           lead to. The index is built the first time it is needed, and
+           again the first time it is needed after the links change.
+
+           Parameters:
+           stored_only(bool): if True, the index only covers the links
+                              already in the arrays, and any links still
+                              in the buffer are left out (see
+                              pending_links), rather than merged in first
+
+           Returns:
+           tuple: three numpy.ndarrays, in_offsets, in_sources and order,
+                  where the inlinks of page i come from the pages
+                  in_sources[in_offsets[i]:in_offsets[i + 1]], and
+                  order gives the position in targets of each of them
+
+           Complexity Analysis:
+           Building the index sorts the L links by the page they lead
+           to, in O(P + L log L) time. After that, it is returned in O(1),
+           or O(P) if pages have been added since.
+
+        """
+        if stored_only is False:
+            self.compact()
+        num_pages = len(self.page_ids)
+        # rebuild the index if the links changed
+        if self._inlinks is None or self._inlinks[0] is not self.targets:
+            # a stable sort keeps the inlinks of each page in source order
+            order = np.argsort(self.targets, kind='stable')
+            in_offsets = np.zeros(num_pages + 1, dtype=np.int64)
+            np.cumsum(
+                np.bincount(self.targets, minlength=num_pages),
+                out=in_offsets[1:]
+            )
+            degrees = np.diff(self.offsets)
+            sources = np.repeat(
+                np.arange(len(degrees), dtype=np.int32), degrees
+            )
+            self._inlinks = (self.targets, in_offsets, sources[order], order)
+        # pages added since have no inlinks in the arrays
+        in_offsets = self._inlinks[1]
+        if len(in_offsets) <= num_pages:
+            missing = num_pages + 1 - len(in_offsets)
+            in_offsets = np.append(
+                in_offsets, np.full(missing, in_offsets[-1])
+            )
+            self._inlinks = (self.targets, in_offsets) + self._inlinks[2:]
+        return self._inlinks[1:]
+
+    def inlinks(self, index):
+        """Return the indices of the pages that link to a page.
+
+           Parameters:
+           index(int): the index of the page
+
+           Returns: numpy.ndarray: the indices of its inlinks, in order
+
+           Complexity Analysis:
+           The inlinks already in the arrays are a slice of the inlink
+           index, so this runs in O(k) for a page with k inlinks, plus
+           O(N) to search the N links still in the buffer.
+
+        """
+        in_offsets, in_sources, _ = self.inlink_index(stored_only=True)
+        stored = in_sources[in_offsets[index]:in_offsets[index + 1]]
+        if len(self._new_sources) == 0:
+            return stored
+        # the links to this page waiting in the buffer
+        new_sources = np.frombuffer(self._new_sources, dtype=np.int32)
+        new_targets = np.frombuffer(self._new_targets, dtype=np.int32)
+        added = new_sources[new_targets == index]
+        if len(added) == 0:
+            return stored
+        # a page links to another at most once
+        return np.unique(np.concatenate((stored, added)))
+
+    def in_degrees(self):
+        '''Return an array of the number of inlinks of each page.'''
+        in_offsets, _, _ = self.inlink_index()
+        return np.diff(in_offsets)
+
+    def has_link(self, source, target):
+        '''Return True if there is a link between the two page indices.'''
+        if len(self._new_sources) == 0 or source + 1 >= len(self.offsets):
+            return bool(np.any(self.neighbors(source) == target))
+        stored = self.targets[self.offsets[source]:self.offsets[source + 1]]
+        if np.any(stored == target):
+            return True
+        new_sources = np.frombuffer(self._new_sources, dtype=np.int32)
+        new_targets = np.frombuffer(self._new_targets, dtype=np.int32)
+        return bool(np.any((new_sources == source) & (new_targets == target)))
+
+    def out_degrees(self, compact=True):
+        """Return an array of the number of outlinks of each page.
+
+           Parameters:
+           compact(bool): if False, the links in the buffer are counted
+                          without merging them into the arrays
+
+           Returns: numpy.ndarray: the out-degree of each page
+
+        """
+        if compact is True:
+            self.compact()
+            return np.diff(self.offsets)
+        degrees = np.zeros(len(self.page_ids), dtype=np.int64)
+        degrees[:len(self.offsets) - 1] = np.diff(self.offsets)
+        new_sources, _ = self.pending_links()
+        degrees += np.bincount(new_sources, minlength=len(degrees))
+        return degrees
+
+    def sources(self):
+        '''Return the index of the page each link in targets starts at.'''
+        degrees = self.out_degrees()
+        return np.repeat(np.arange(len(degrees), dtype=np.int32), degrees)
+
+    def link_weights(self):
+        """Return the weight of each link in targets, which is the inverse
+           of the number of outlinks of the page it starts at.
+
+        """
+        if self.weights is not None:
+            return self.weights
+        degrees = self.out_degrees()
+        return 1 / np.repeat(degrees, degrees)
@@ -32,10 +32,11 @@
 Minimization and maximization algorithms.
 
 @sort: heuristic_search, minimal_spanning_tree_prim,
-minimal_spanning_tree_kruskal, shortest_path, shortest_path_bellman_ford
+minimal_spanning_tree_kruskal, shortest_path, shortest_path_bellman_ford,
+shortest_path_bidirectional
 """
 
-from pygraph.algorithms.utils import heappush, heappop
+from pygraph.algorithms.utils import heappush, heappop, priority_queue
 from pygraph.classes.exceptions import NodeUnreachable
 from pygraph.classes.exceptions import NegativeWeightCycleError
 from pygraph.classes.digraph import digraph
@@ -43,6 +44,11 @@ from pygraph.classes.unionfind import UnionFind
 import heapq
 import bisect
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Minimal spanning tree
 
 
@@ -50,6 +56,10 @@ def minimal_spanning_tree_prim(graph, root=None, parallel=None):
     """
     Minimal spanning tree constructed with prim's algorithm.
 
+    The nodes waiting to join the tree are kept in an indexed binary heap, keyed by the
+    weight of the lightest edge reaching them from the tree, which is lowered in place when
+    a lighter edge is found. This takes O(E log V) time.
+
     @attention: Minimal spanning tree is meaningful only for weighted graphs.
 
     @type  graph: graph
@@ -59,33 +69,40 @@ def minimal_spanning_tree_prim(graph, root=None, parallel=None):
     @param root: Optional root node (will explore only root's connected component)
 
     @rtype:  dictionary
-    @return: Generated spanning tree.
+    @return: Generated spanning tree, mapping each node to its parent in the tree. The root
+    of each tree maps to None. Without a root, a tree is grown from the first unvisited node
+    of each connected component, giving a spanning forest.
     """
-    visited = []            # List for marking visited and non-visited nodes
+    visited = set()           # Set of nodes already in the spanning tree
     spanning_tree = {}        # Minimal Spanning tree
 
-    # Initialization
     if (root is not None):
-        visited.append(root)
-        nroot = root
-        spanning_tree[root] = None
+        roots = [root]
     else:
-        nroot = 1
+        roots = graph
 
-    # Algorithm loop
-    while (nroot is not None):
-        ledge = _lightest_edge(graph, visited)
-        if (ledge is None):
-            if (root is not None):
-                break
-            nroot = _first_unvisited(graph, visited)
-            if (nroot is not None):
-                spanning_tree[nroot] = None
-            visited.append(nroot)
-        else:
-            spanning_tree[ledge[1]] = ledge[0]
-            spanning_tree[ledge[0]] = ledge[1]
-            visited.append(ledge[1])
+    # Algorithm loop, once per tree of the forest
+    for nroot in roots:
+        if (nroot in visited):
+            continue
+        spanning_tree[nroot] = None
+        parent = {}
+        queue = priority_queue([nroot])
+        while (len(queue) > 0):
+            node = queue.pop()
+            visited.add(node)
+            if (node != nroot):
+                spanning_tree[node] = parent[node]
+            for other in graph[node]:
+                if (other in visited):
+                    continue
+                w = graph.edge_weight((node, other))
+                if (other not in queue):
+                    queue.insert(other, w)
+                    parent[other] = node
+                elif (w < queue.priority(other)):
+                    queue.decrease_key(other, w)
+                    parent[other] = node
 
     return spanning_tree
 
@@ -94,6 +111,9 @@ def minimal_spanning_tree_kruskal(graph, root=None, parallel=None):
     """
     Minimal spanning tree constructed with kruskal's algorithm.
 
+    The nodes are numbered for a UnionFind, and the edges are sorted by weight all at once
+    (with NumPy, if it is available), so this takes O(E log E) time.
+
     @attention: Minimal spanning tree is meaningful only for weighted graphs.
 
     @type  graph: graph
@@ -103,82 +123,46 @@ def minimal_spanning_tree_kruskal(graph, root=None, parallel=None):
     @param root: Optional root node (will explore only root's connected component)
 
     @rtype:  dictionary
-    @return: Generated spanning tree.
+    @return: Generated spanning tree, mapping each node to its parent in the tree, as
+    minimal_spanning_tree_prim() returns it.
     """
-
-    EDGE_WEIGHT = 0
-    EDGE_OBJ = 1
-
-    if root is not None:
-        # Will be implemented later
-        pass
+    nodes = graph.nodes()
+    index = dict((node, i) for i, node in enumerate(nodes))
+    edges = graph.edges()
+    weights = [graph.edge_weight(edge) for edge in edges]
+    if numpy is not None and len(edges) > 0:
+        order = numpy.argsort(numpy.array(weights), kind='stable').tolist()
     else:
-        root = 0
-
+        order = sorted(range(len(edges)), key=weights.__getitem__)
+
+    # Join the components of the lightest edges first, skipping any that would make a cycle
+    cycle_checker = UnionFind(len(nodes))
+    tree_edges = dict((node, []) for node in nodes)
+    for i in order:
+        u, v = edges[i]
+        if cycle_checker.union(index[u], index[v]):
+            tree_edges[u].append(v)
+            tree_edges[v].append(u)
+
+    # Hang each tree from its root
+    if (root is not None):
+        roots = [root]
+    else:
+        roots = nodes
     spanning_tree = {}
-    edges = graph.edges()
-    num_edges = len(edges)
-    edges_heap = []
-
-    for edge in [(graph.edge_weight(edge), edge) for edge in edges]:
-        heapq.heappush(edges_heap, edge)
-    heapq.heapify(edges_heap)
-   
-    spanning_tree[root] = None
-    cycle_checker = UnionFind(num_edges)
-    for min_edge in range(num_edges):
-        min_elem = heapq.heappop(edges_heap)
-        min_edge = min_elem[EDGE_OBJ]
-        if not cycle_checker.find(min_edge[0], min_edge[1]):
-            cycle_checker.union(min_edge[0], min_edge[1])
-            spanning_tree[min_edge[1]] = min_edge[0]
-            spanning_tree[min_edge[0]] = min_edge[1]
-
-    return spanning_tree 
-
-
-def _first_unvisited(graph, visited):
-    """
-    Return first unvisited node.
-    
-    @type  graph: graph
-    @param graph: Graph.
-
-    @type  visited: list
-    @param visited: List of nodes.
-    
-    @rtype:  node
-    @return: First unvisited node.
-    """
-    for each in graph:
-        if (each not in visited):
-            return each
-    return None
-
-
-def _lightest_edge(graph, visited):
-    """
-    Return the lightest edge in graph going from a visited node to an unvisited one.
-    
-    @type  graph: graph
-    @param graph: Graph.
-
-    @type  visited: list
-    @param visited: List of nodes.
+    for nroot in roots:
+        if (nroot in spanning_tree):
+            continue
+        spanning_tree[nroot] = None
+        stack = [nroot]
+        while (stack):
+            node = stack.pop()
+            for other in tree_edges[node]:
+                if (other not in spanning_tree):
+                    spanning_tree[other] = node
+                    stack.append(other)
 
-    @rtype:  tuple
-    @return: Lightest edge in graph going from a visited node to an unvisited one.
-    """
-    lightest_edge = None
-    weight = None
-    for each in visited:
-        for other in graph[each]:
-            if (other not in visited):
-                w = graph.edge_weight((each, other))
-                if (weight is None or w < weight or weight < 0):
-                    lightest_edge = (each, other)
-                    weight = w
-    return lightest_edge
+    return spanning_tree
 
 
 # Shortest Path
@@ -232,6 +216,84 @@ def shortest_path(graph, source):
     return previous, dist
 
 
+def shortest_path_bidirectional(graph, source, target):
+    """
+    Return the shortest path distance between two nodes, and the path itself, using
+    bidirectional Dijkstra's algorithm.
+
+    One search goes forward from the source along the edges leaving each node, and another
+    goes backward from the target along the edges arriving at each node (the incidents of a
+    digraph), always advancing the search whose next node is nearer. They stop once no path
+    through the nodes still queued can be shorter than the best path found where the two
+    searches meet, which usually happens long before either has explored the whole graph.
+
+    @attention: All weights must be nonnegative.
+
+    @see: shortest_path
+
+    @type  graph: graph, digraph
+    @param graph: Graph.
+
+    @type  source: node
+    @param source: Node from which to start the search.
+
+    @type  target: node
+    @param target: Node the path must end at.
+
+    @rtype:  tuple
+    @return: The shortest distance from source to target, and the list of nodes along the
+    path, from source to target.
+
+    @raise NodeUnreachable: If target can't be reached from source.
+    """
+    if source == target:
+        return 0, [source]
+    if (graph.DIRECTED):
+        backward = graph.incidents
+    else:
+        backward = graph.neighbors
+
+    # Distances and parents of each search, forward from the source and backward from the
+    # target. Parents in the backward search are the next node on the way to the target.
+    dist = ({source: 0}, {target: 0})
+    previous = ({source: None}, {target: None})
+    queues = ([(0, source)], [(0, target)])
+    settled = (set(), set())
+    best, meeting = None, None
+
+    while queues[0] and queues[1]:
+        # Stop once no path through the queued nodes can be shorter
+        if best is not None and queues[0][0][0] + queues[1][0][0] >= best:
+            break
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        du, u = heapq.heappop(queues[side])
+        if u in settled[side] or dist[side][u] < du:
+            continue
+        settled[side].add(u)
+        if side == 0:
+            edges = ((v, graph.edge_weight((u, v))) for v in graph[u])
+        else:
+            edges = ((v, graph.edge_weight((v, u))) for v in backward(u))
+        for v, weight in edges:
+            alt = du + weight
+            if (v not in dist[side]) or (alt < dist[side][v]):
+                dist[side][v] = alt
+                previous[side][v] = u
+                heapq.heappush(queues[side], (alt, v))
+            # A path through the edge joining the two searches
+            if v in dist[1 - side]:
+                total = dist[side][v] + dist[1 - side][v]
+                if best is None or total < best:
+                    best, meeting = total, v
+
+    if best is None:
+        raise NodeUnreachable(source, target)
+    path = [n for n in _reconstruct_path(meeting, previous[0])]
+    path.reverse()
+    path.extend(_reconstruct_path(previous[1][meeting], previous[1]))
+    return best, path
+
+
 def shortest_path_bellman_ford(graph, source):
     """
     Return the shortest path distance between the source node and all other 
@@ -26,10 +26,21 @@
 """
 PageRank algoritm
 
-@sort: pagerank
+@sort: pagerank, solve_pagerank, power_solver, gauss_seidel_solver, extrapolation_solver,
+adaptive_solver, personalized_pagerank, top_k_nodes
 """
 
-def pagerank(graph, damping_factor=0.85, max_iterations=100, min_delta=0.00001):
+from collections import deque, namedtuple
+from heapq import nlargest
+from operator import itemgetter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def pagerank(graph, damping_factor=0.85, max_iterations=100, min_delta=0.00001, initial=None,
+             solver='power'):
     """
     Compute and return the PageRank in an directed graph.    
     
@@ -45,10 +56,27 @@ def pagerank(graph, damping_factor=0.85, max_iterations=100, min_delta=0.00001):
     @type  min_delta: number
     @param min_delta: Smallest variation required to have a new iteration.
     
+    @type  initial: dict
+    @param initial: PageRank to start iterating from, such as the result of an earlier run
+    on a slightly changed graph. Nodes not in the dict start at 1/N of the total, nodes no longer in the
+    graph are ignored, and the values are scaled to keep the total of the given ones.
+    
+    @type  solver: string
+    @param solver: Name of the solver in SOLVERS to use (see solve_pagerank). Solvers other
+    than 'power' need NumPy and a digraph.
+    
     @rtype:  Dict
     @return: Dict containing all the nodes PageRank.
+    
+    @raise ValueError: If the solver is unknown, or can't be used without NumPy or a digraph.
     """
     
+    if solver not in SOLVERS:
+        raise ValueError("Unknown PageRank solver: %s" % solver)
+    use_arrays = numpy is not None and hasattr(graph, 'out_degrees')
+    if solver != 'power' and not use_arrays:
+        raise ValueError("The %s PageRank solver needs NumPy and a digraph" % solver)
+    
     nodes = graph.nodes()
     graph_size = len(nodes)
     if graph_size == 0:
@@ -57,20 +85,440 @@ def pagerank(graph, damping_factor=0.85, max_iterations=100, min_delta=0.00001):
     
     # itialize the page rank dict with 1/N for all nodes
     pagerank = dict.fromkeys(nodes, 1.0/graph_size)
+    if initial:
+        # start from the given values instead, keeping their total
+        total = float(sum(initial.values()))
+        for node in nodes:
+            pagerank[node] = initial.get(node, total/graph_size)
+        scale = float(sum(pagerank.values()))
+        if scale > 0:
+            for node in nodes:
+                pagerank[node] *= total / scale
+    
+    # iterate over arrays of the links when possible
+    if use_arrays:
+        return _pagerank_arrays(graph, nodes, pagerank, damping_factor, max_iterations, min_delta,
+                                solver)
         
+    # count the links leaving each node once, rather than once per link per iteration
+    out_degree = dict((node, _out_degree(graph, node)) for node in nodes)
+    
     for i in range(max_iterations):
         diff = 0 #total difference compared to last iteraction
-        # computes each node PageRank based on inbound links
+        # computes each node PageRank based on inbound links, from the values of the last
+        # iteration, as the array path (and power_solver) does
+        new_pagerank = {}
         for node in nodes:
             rank = min_value
             for referring_page in graph.incidents(node):
-                rank += damping_factor * pagerank[referring_page] / len(graph.neighbors(referring_page))
+                rank += damping_factor * pagerank[referring_page] / out_degree[referring_page]
                 
             diff += abs(pagerank[node] - rank)
-            pagerank[node] = rank
+            new_pagerank[node] = rank
+        pagerank = new_pagerank
         
         #stop if PageRank has converged
         if diff < min_delta:
             break
     
     return pagerank
+
+
+def _pagerank_arrays(graph, nodes, pagerank, damping_factor, max_iterations, min_delta,
+                     solver='power'):
+    """
+    Compute the PageRank of a directed graph like pagerank(), but with the links and
+    out-degrees read into arrays once, so each iteration is a few NumPy operations rather
+    than a Python loop over every link.
+    
+    @type  graph: digraph
+    @param graph: Digraph.
+    
+    @type  nodes: list
+    @param nodes: The nodes of the graph.
+    
+    @type  pagerank: dict
+    @param pagerank: The PageRank of each node to start from.
+    
+    @type  solver: string
+    @param solver: Name of the solver in SOLVERS to use.
+    
+    @rtype:  Dict
+    @return: Dict containing all the nodes PageRank.
+    """
+    index = dict((node, i) for i, node in enumerate(nodes))
+    out_degree = graph.out_degrees(nodes)
+    # the referring pages of each node, one row per node
+    indptr = numpy.zeros(len(nodes) + 1, dtype=numpy.intp)
+    indptr[1:] = numpy.cumsum([len(graph.node_incidence[node]) for node in nodes])
+    indices = numpy.array([index[referring_page] for node in nodes
+                           for referring_page in graph.node_incidence[node]], dtype=numpy.intp)
+    matrix = _LinkRows(indptr, indices, 1.0 / out_degree[indices])
+    
+    initial = numpy.array([pagerank[node] for node in nodes], dtype=float)
+    ranks, iterations, diff = solve_pagerank(matrix, damping_factor, None, initial, min_delta,
+                                             max_iterations, solver)
+    return dict(zip(nodes, ranks.tolist()))
+
+
+# a matrix in compressed sparse row form, as the solvers take it
+_LinkRows = namedtuple('_LinkRows', 'indptr indices data')
+
+def solve_pagerank(matrix, damping_factor=0.85, dangling=None, initial=None, min_delta=0.00001,
+                   max_iterations=100, solver='power'):
+    """
+    Compute the PageRank of a graph given as a sparse matrix of its links, with one of the
+    solvers in SOLVERS.
+    
+    Every solver looks for the same PageRank: each node's value is (1 - damping_factor)/N
+    plus damping_factor times the value passed to it along links, and they all stop once
+    the values change by less than min_delta (in total) between two iterations.
+    
+    @type  matrix: object
+    @param matrix: N x N matrix in compressed sparse row form, with indptr, indices and data
+    arrays (such as a LinkMatrix, or a scipy.sparse.csr_matrix). Row i holds the share of
+    each node's value passed to node i.
+    
+    @type  damping_factor: number
+    @param damping_factor: PageRank dumping factor.
+    
+    @type  dangling: array
+    @param dangling: Boolean array marking the nodes without outbound links, whose value is
+    shared evenly by all nodes. If None, their value is lost.
+    
+    @type  initial: array
+    @param initial: Values to start iterating from. If None, every node starts at 1/N.
+    
+    @type  min_delta: number
+    @param min_delta: Smallest variation required to have a new iteration.
+    
+    @type  max_iterations: number 
+    @param max_iterations: Maximum number of iterations.
+    
+    @type  solver: string
+    @param solver: Name of the solver in SOLVERS to use.
+    
+    @rtype:  tuple
+    @return: The array of PageRank values, the number of iterations run, and the variation
+    in the last iteration.
+    """
+    if solver not in SOLVERS:
+        raise ValueError("Unknown PageRank solver: %s" % solver)
+    graph_size = len(matrix.indptr) - 1
+    if initial is None:
+        ranks = numpy.full(graph_size, 1.0/graph_size)
+    else:
+        ranks = numpy.array(initial, dtype=float)
+    return SOLVERS[solver](matrix, ranks, damping_factor, dangling, min_delta, max_iterations)
+
+
+def _rows_dot(matrix, vector, rows):
+    """
+    Return the product of some rows of a sparse matrix and a vector.
+    
+    @type  matrix: object
+    @param matrix: Matrix in compressed sparse row form.
+    
+    @type  vector: array
+    @param vector: Vector to multiply.
+    
+    @type  rows: array
+    @param rows: Indices of the rows to multiply.
+    
+    @rtype:  array
+    @return: The product of each row and the vector.
+    """
+    indptr = matrix.indptr
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    ends = numpy.cumsum(counts)
+    result = numpy.zeros(len(rows))
+    if len(ends) == 0 or ends[-1] == 0:
+        return result
+    # the position of each stored value of the rows, in order
+    positions = numpy.arange(ends[-1]) + numpy.repeat(starts - (ends - counts), counts)
+    products = matrix.data[positions] * vector[matrix.indices[positions]]
+    filled = numpy.flatnonzero(counts)
+    result[filled] = numpy.add.reduceat(products, (ends - counts)[filled])
+    return result
+
+
+def _dot(matrix, vector):
+    """
+    Return the product of a whole sparse matrix and a vector, with the dot() method of the
+    matrix if it has one (as LinkMatrix and scipy.sparse matrices do).
+    """
+    if hasattr(matrix, 'dot'):
+        return matrix.dot(vector)
+    return _rows_dot(matrix, vector, numpy.arange(len(matrix.indptr) - 1))
+
+
+def _pagerank_rows(matrix, ranks, damping_factor, dangling, rows=None):
+    """
+    Return the next PageRank value of some nodes (or of every node, if rows is None),
+    given the current values of all of them.
+    """
+    graph_size = len(ranks)
+    if rows is None:
+        values = damping_factor * _dot(matrix, ranks)
+    else:
+        values = damping_factor * _rows_dot(matrix, ranks, rows)
+    values += (1.0-damping_factor)/graph_size
+    if dangling is not None:
+        values += damping_factor * ranks[dangling].sum() / graph_size
+    return values
+
+
+def _column_sums(matrix, graph_size, dangling):
+    """
+    Return the share of each node's value passed on along its links (the sum of its column
+    of the matrix), and whether every node passes all of its value on. The total of the
+    values then only changes through the random jumps, and is easy to keep track of.
+    """
+    column_sums = numpy.bincount(matrix.indices, weights=matrix.data, minlength=graph_size)
+    passed = column_sums.copy()
+    if dangling is not None:
+        passed[dangling] += 1
+    return column_sums, bool(numpy.allclose(passed, 1))
+
+
+def _scale_to_power_total(ranks, last_ranks, column_sums, damping_factor, dangling):
+    """
+    Scale the values of the nodes, in place, to the total a power iteration from
+    last_ranks would give them. Updates that use some of the newest values along the way,
+    or that extrapolate, don't keep track of the total by themselves, and when every node
+    passes all of its value on, the error they leave in it shrinks far more slowly than
+    the rest.
+    """
+    total = damping_factor * numpy.dot(column_sums, last_ranks) + (1.0-damping_factor)
+    if dangling is not None:
+        total += damping_factor * last_ranks[dangling].sum()
+    current = ranks.sum()
+    if current > 0:
+        ranks *= total / current
+
+
+def power_solver(matrix, ranks, damping_factor, dangling, min_delta, max_iterations):
+    """
+    Power iteration: every node is updated at once from the values of the last iteration.
+    
+    See solve_pagerank() for the parameters and return value.
+    """
+    iterations, diff = 0, None
+    while iterations < max_iterations:
+        new_ranks = _pagerank_rows(matrix, ranks, damping_factor, dangling)
+        diff = numpy.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        iterations += 1
+        if diff < min_delta:
+            break
+    return ranks, iterations, diff
+
+
+def gauss_seidel_solver(matrix, ranks, damping_factor, dangling, min_delta, max_iterations,
+                        num_blocks=16):
+    """
+    Block Gauss-Seidel: the nodes are split into blocks of consecutive rows, and each block
+    is updated in turn from the newest values, including those of the blocks before it in
+    the same sweep.
+    
+    See solve_pagerank() for the parameters and return value.
+    
+    @type  num_blocks: number
+    @param num_blocks: Number of blocks to split the nodes into. With 1 block, this is the
+    same as power_solver().
+    """
+    graph_size = len(ranks)
+    ranks = ranks.copy()
+    column_sums, keep_total = _column_sums(matrix, graph_size, dangling)
+    bounds = numpy.linspace(0, graph_size, min(num_blocks, graph_size) + 1).astype(int)
+    iterations, diff = 0, None
+    while iterations < max_iterations:
+        last_ranks = ranks.copy()
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows = numpy.arange(start, stop)
+            ranks[start:stop] = _pagerank_rows(matrix, ranks, damping_factor, dangling, rows)
+        if keep_total:
+            _scale_to_power_total(ranks, last_ranks, column_sums, damping_factor, dangling)
+        diff = numpy.abs(ranks - last_ranks).sum()
+        iterations += 1
+        if diff < min_delta:
+            break
+    return ranks, iterations, diff
+
+
+def extrapolation_solver(matrix, ranks, damping_factor, dangling, min_delta, max_iterations,
+                         period=10):
+    """
+    Power iteration with quadratic extrapolation: every few iterations, the values are
+    moved to where the last four iterations appear to be converging to, assuming the
+    error is made of the two slowest-shrinking parts it can be split into.
+    
+    See solve_pagerank() for the parameters and return value.
+    
+    @type  period: number
+    @param period: Number of iterations between extrapolations.
+    """
+    column_sums, keep_total = _column_sums(matrix, len(ranks), dangling)
+    history = deque([ranks], maxlen=4)
+    iterations, diff = 0, None
+    while iterations < max_iterations:
+        new_ranks = _pagerank_rows(matrix, ranks, damping_factor, dangling)
+        diff = numpy.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        iterations += 1
+        if diff < min_delta:
+            break
+        history.append(ranks)
+        if iterations % period == 0 and len(history) == 4:
+            first, second, third, fourth = history
+            # find the quadratic whose roots are the two rates the error shrinks at, by
+            # least squares over the steps from the first of the four iterations
+            steps = numpy.stack((second - first, third - first), axis=1)
+            coefficients = numpy.linalg.lstsq(steps, first - fourth, rcond=None)[0]
+            weights = numpy.array([coefficients.sum() + 1, coefficients[1] + 1, 1.0])
+            if numpy.isfinite(weights).all() and weights.sum() != 0:
+                ranks = (weights[0]*second + weights[1]*third + weights[2]*fourth) / weights.sum()
+                if keep_total:
+                    _scale_to_power_total(ranks, fourth, column_sums, damping_factor, dangling)
+            history.clear()
+            history.append(ranks)
+    return ranks, iterations, diff
+
+
+def adaptive_solver(matrix, ranks, damping_factor, dangling, min_delta, max_iterations,
+                    period=5):
+    """
+    Adaptive power iteration: nodes whose value has stopped changing are no longer updated,
+    so most iterations only work on the nodes that are still converging. Every few
+    iterations, all the nodes are updated again, to check for convergence and to pick the
+    nodes to keep updating.
+    
+    See solve_pagerank() for the parameters and return value.
+    
+    @type  period: number
+    @param period: Number of iterations between updates of every node.
+    """
+    graph_size = len(ranks)
+    ranks = ranks.copy()
+    every_row = numpy.arange(graph_size)
+    rows = every_row
+    iterations, diff = 0, None
+    while iterations < max_iterations:
+        checking = iterations % period == 0
+        if checking:
+            rows = every_row
+        new_ranks = _pagerank_rows(matrix, ranks, damping_factor, dangling, rows)
+        changes = numpy.abs(new_ranks - ranks[rows])
+        ranks[rows] = new_ranks
+        iterations += 1
+        if checking:
+            #stop only when no node has moved much
+            diff = changes.sum()
+            if diff < min_delta:
+                break
+        # freeze the nodes that barely changed
+        rows = rows[changes >= min_delta / graph_size]
+    return ranks, iterations, diff
+
+
+# PageRank solvers by name, for solve_pagerank()
+SOLVERS = {
+    'power': power_solver,
+    'gauss_seidel': gauss_seidel_solver,
+    'extrapolation': extrapolation_solver,
+    'adaptive': adaptive_solver,
+}
+
+
+def personalized_pagerank(graph, seeds, damping_factor=0.85, min_residual=0.000001):
+    """
+    Compute and return the PageRank of a directed graph personalized to some seed nodes,
+    where every random jump goes back to one of the seeds.
+    
+    The PageRank is approximated by forward push, which only visits the nodes near the
+    seeds: each node with enough residual rank keeps (1 - damping_factor) of it and
+    passes the rest on to its neighbors (or back to the seeds, if it has none).
+    
+    @type  graph: digraph
+    @param graph: Digraph.
+    
+    @type  seeds: dict
+    @param seeds: Dict mapping each seed node to its weight in the teleport distribution.
+    The weights are normalized.
+    
+    @type  damping_factor: number
+    @param damping_factor: PageRank dumping factor.
+    
+    @type  min_residual: number
+    @param min_residual: Smallest residual rank, per neighbor, that a node will push.
+    
+    @rtype:  Dict
+    @return: Dict containing the PageRank of the nodes that were reached. Nodes that are not
+    in the dict have a PageRank of about 0.
+    
+    @raise KeyError: If a seed is not a node of the graph.
+    """
+    
+    for node in seeds:
+        if not graph.has_node(node):
+            raise KeyError("Seed %s is not a node of the graph" % (node,))
+    total_weight = float(sum(seeds.values()))
+    teleport = dict((node, weight / total_weight) for node, weight in seeds.items())
+    
+    pagerank = {}
+    residual = dict(teleport)
+    queue = deque(teleport)
+    queued = set(teleport)
+    
+    while queue:
+        node = queue.popleft()
+        queued.discard(node)
+        neighbors = graph.neighbors(node)
+        rank = residual[node]
+        if rank < min_residual * max(len(neighbors), 1):
+            continue
+        
+        # keep part of the residual rank and push the rest
+        residual[node] = 0
+        pagerank[node] = pagerank.get(node, 0) + (1 - damping_factor) * rank
+        if neighbors:
+            share = damping_factor * rank / len(neighbors)
+            pushes = [(neighbor, share) for neighbor in neighbors]
+        else:
+            pushes = [(seed, damping_factor * rank * weight) for seed, weight in teleport.items()]
+        
+        for other, amount in pushes:
+            residual[other] = residual.get(other, 0) + amount
+            if other not in queued and residual[other] >= min_residual * max(_out_degree(graph, other), 1):
+                queue.append(other)
+                queued.add(other)
+    
+    return pagerank
+
+def top_k_nodes(pagerank, k):
+    """
+    Return the k nodes with the highest PageRank, without sorting all of them.
+
+    @type  pagerank: dict
+    @param pagerank: Dict containing all the nodes PageRank, as returned by pagerank().
+
+    @type  k: number
+    @param k: Number of nodes to return.
+
+    @rtype:  list
+    @return: List of (node, PageRank) tuples for the k highest ranked nodes, from highest
+    to lowest. Nodes with equal PageRank keep the order they have in the pagerank dict.
+    """
+    # a bounded heap of k items: O(N log k)
+    return nlargest(k, pagerank.items(), key=itemgetter(1))
+
+
+def _out_degree(graph, node):
+    """
+    Return the number of edges leaving a node, from the counter kept by digraph if there
+    is one, as neighbors() makes a new list each time it is called.
+    """
+    if hasattr(graph, 'out_degree'):
+        return graph.out_degree(node)
+    return len(graph.neighbors(node))
@@ -29,24 +29,50 @@ Miscellaneous useful stuff.
 """
 
 # Imports
-from heapq import heappush, heappop, heapify
+from heapq import heappush, heappop
 
 
 # Priority Queue
 class priority_queue:
     """
     Priority queue.
+
+    The queue is an indexed binary heap: besides the heap itself, it keeps the position of
+    each item in the heap, so membership and priority lookups take O(1), and changing the
+    priority of an item or discarding it takes O(log n). Each item is in the queue at most
+    once.
     """
     
-    def __init__(self, list=[]):
-        self.heap = [HeapItem(i, 0) for i in list]
-        heapify(self.heap)
+    def __init__(self, list=[], priorities=None):
+        """
+        Build a queue of the given items all at once.
+
+        @type  list: sequence
+        @param list: Items to put in the queue.
+
+        @type  priorities: sequence
+        @param priorities: Priority of each item (such as a NumPy array). Defaults to 0 for
+        every item. If an item is repeated, its lowest priority is kept.
+        """
+        if priorities is None:
+            priorities = [0] * len(list)
+        elif hasattr(priorities, 'tolist'):
+            priorities = priorities.tolist()
+        if hasattr(list, 'tolist'):
+            list = list.tolist()
+        lowest = {}
+        for item, priority in zip(list, priorities):
+            if item not in lowest or priority < lowest[item]:
+                lowest[item] = priority
+        self.heap = [[priority, item] for item, priority in lowest.items()]
+        self.position = dict((entry[1], index) for index, entry in enumerate(self.heap))
+        # sift each parent down, from the last one up to the root, which builds the heap
+        # in O(n) and, unlike heapq.heapify, never compares the items themselves
+        for index in range(len(self.heap) // 2 - 1, -1, -1):
+            self._sift_down(index)
 
     def __contains__(self, item):
-        for heap_item in self.heap:
-            if item == heap_item.item:
-                return True
-        return False
+        return item in self.position
 
     def __len__(self):
         return len(self.heap)
@@ -56,34 +82,99 @@ class priority_queue:
 
     def insert(self, item, priority):
         """
-        Insert item into the queue, with the given priority.
+        Insert item into the queue, with the given priority. If the item is already in the
+        queue, its priority is changed instead.
+        """
+        if item in self.position:
+            index = self.position[item]
+            old = self.heap[index][0]
+            self.heap[index][0] = priority
+            if priority < old:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+        else:
+            self.heap.append([priority, item])
+            self._sift_up(len(self.heap) - 1)
+
+    def decrease_key(self, item, priority):
         """
-        heappush(self.heap, HeapItem(item, priority))
+        Lower the priority of an item in the queue.
+
+        @raise ValueError: If the new priority is greater than the current one.
+        """
+        index = self.position[item]
+        if priority > self.heap[index][0]:
+            raise ValueError("New priority %s is greater than the current priority of %s" % (priority, item))
+        self.heap[index][0] = priority
+        self._sift_up(index)
+
+    def priority(self, item):
+        """
+        Return the priority of an item in the queue.
+        """
+        return self.heap[self.position[item]][0]
 
     def pop(self):
         """
         Return the item with the lowest priority, and remove it from the queue.
         """
-        return heappop(self.heap).item
+        return self._remove(0)[1]
 
     def peek(self):
         """
         Return the item with the lowest priority. The queue is unchanged.
         """
-        return self.heap[0].item
+        return self.heap[0][1]
 
     def discard(self, item):
-        new_heap = []
-        for heap_item in self.heap:
-            if item != heap_item.item:
-                new_heap.append(heap_item)
-        self.heap = new_heap
-        heapify(self.heap)
-
-class HeapItem:
-    def __init__(self, item, priority):
-        self.item = item
-        self.priority = priority
-
-    def __cmp__(self, other):
-        return cmp(self.priority, other.priority)
+        """
+        Remove an item from the queue, if it is in the queue.
+        """
+        if item in self.position:
+            self._remove(self.position[item])
+
+    def _remove(self, index):
+        heap = self.heap
+        entry = heap[index]
+        last = heap.pop()
+        del(self.position[entry[1]])
+        if index < len(heap):
+            heap[index] = last
+            self.position[last[1]] = index
+            if last[0] < entry[0]:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+        return entry
+
+    def _sift_up(self, index):
+        heap, position = self.heap, self.position
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent][0] <= entry[0]:
+                break
+            heap[index] = heap[parent]
+            position[heap[index][1]] = index
+            index = parent
+        heap[index] = entry
+        position[entry[1]] = index
+
+    def _sift_down(self, index):
+        heap, position = self.heap, self.position
+        entry = heap[index]
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if entry[0] <= heap[child][0]:
+                break
+            heap[index] = heap[child]
+            position[heap[index][1]] = index
+            index = child
+        heap[index] = entry
+        position[entry[1]] = index
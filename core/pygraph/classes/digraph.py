@@ -34,6 +34,11 @@ from pygraph.mixins.labeling import labeling
 from pygraph.mixins.common import common
 from pygraph.mixins.basegraph import basegraph
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class digraph (basegraph, common, labeling):
     """
     Digraph class.
@@ -41,7 +46,8 @@ class digraph (basegraph, common, labeling):
     Digraphs are built of nodes and directed edges.
 
     @sort: __eq__, __init__, __ne__, add_edge, add_node, del_edge, del_node, edges, has_edge, has_node,
-    incidents, neighbors, node_order, nodes 
+    in_degree, in_degrees, incidents, neighbors, node_order, nodes, out_degree, out_degrees,
+    out_weight, out_weights, set_edge_properties
     """
     
     DIRECTED = True
@@ -52,8 +58,13 @@ class digraph (basegraph, common, labeling):
         """
         common.__init__(self)
         labeling.__init__(self)
+        # Neighbors and incident nodes are kept as the keys of dicts, which have O(1)
+        # membership, insertion and deletion, and iterate in the order they were added
         self.node_neighbors = {}     # Pairing: Node -> Neighbors
         self.node_incidence = {}     # Pairing: Node -> Incident nodes
+        self.node_out_degree = {}    # Pairing: Node -> Number of neighbors
+        self.node_in_degree = {}     # Pairing: Node -> Number of incident nodes
+        self.node_out_weight = {}    # Pairing: Node -> Total weight of edges leaving it
         
 
     def nodes(self):
@@ -76,7 +87,7 @@ class digraph (basegraph, common, labeling):
         @rtype:  list
         @return: List of nodes directly accessible from given node.
         """
-        return self.node_neighbors[node]
+        return list(self.node_neighbors[node])
     
     
     def incidents(self, node):
@@ -89,7 +100,7 @@ class digraph (basegraph, common, labeling):
         @rtype:  list
         @return: List of nodes directly accessible from given node.    
         """
-        return self.node_incidence[node]
+        return list(self.node_incidence[node])
 
     def edges(self):
         """
@@ -133,8 +144,11 @@ class digraph (basegraph, common, labeling):
         if attrs is None:
             attrs = []
         if (node not in self.node_neighbors):
-            self.node_neighbors[node] = []
-            self.node_incidence[node] = []
+            self.node_neighbors[node] = {}
+            self.node_incidence[node] = {}
+            self.node_out_degree[node] = 0
+            self.node_in_degree[node] = 0
+            self.node_out_weight[node] = 0
             self.node_attr[node] = attrs
         else:
             raise AdditionError("Node %s already in digraph" % node)
@@ -168,11 +182,15 @@ class digraph (basegraph, common, labeling):
         if v in self.node_neighbors[u] and u in self.node_incidence[v]:
             raise AdditionError("Edge (%s, %s) already in digraph" % (u, v))
         else:
-            self.node_neighbors[u].append(v)
-            self.node_incidence[v].append(u)
-            self.set_edge_weight((u, v), wt)
+            # label the edge before adding it, so its weight is only counted once
+            labeling.set_edge_weight(self, (u, v), wt)
             self.add_edge_attributes( (u, v), attrs )
             self.set_edge_properties( (u, v), label=label, weight=wt )
+            self.node_neighbors[u][v] = None
+            self.node_incidence[v][u] = None
+            self.node_out_degree[u] += 1
+            self.node_in_degree[v] += 1
+            self.node_out_weight[u] += wt
 
 
     def del_node(self, node):
@@ -182,17 +200,20 @@ class digraph (basegraph, common, labeling):
         @type  node: node
         @param node: Node identifier.
         """
-        for each in list(self.incidents(node)):
+        for each in self.incidents(node):
             # Delete all the edges incident on this node
             self.del_edge((each, node))
             
-        for each in list(self.neighbors(node)):
+        for each in self.neighbors(node):
             # Delete all the edges pointing to this node.
             self.del_edge((node, each))
         
         # Remove this node from the neighbors and incidents tables   
         del(self.node_neighbors[node])
         del(self.node_incidence[node])
+        del(self.node_out_degree[node])
+        del(self.node_in_degree[node])
+        del(self.node_out_weight[node])
         
         # Remove any labeling which may exist.
         self.del_node_labeling( node )
@@ -206,11 +227,33 @@ class digraph (basegraph, common, labeling):
         @param edge: Edge.
         """
         u, v = edge
-        self.node_neighbors[u].remove(v)
-        self.node_incidence[v].remove(u)
+        if v not in self.node_neighbors[u]:
+            raise ValueError("Edge (%s, %s) not in digraph" % (u, v))
+        del(self.node_neighbors[u][v])
+        del(self.node_incidence[v][u])
+        self.node_out_degree[u] -= 1
+        self.node_in_degree[v] -= 1
+        self.node_out_weight[u] -= self.edge_weight((u, v))
         self.del_edge_labeling( (u,v) )
 
 
+    def set_edge_properties(self, edge, **properties):
+        """
+        Set properties of an edge. When its weight is set (also by set_edge_weight()), the
+        total weight of the edges leaving its first node is kept up to date.
+
+        @type  edge: edge
+        @param edge: One edge.
+
+        @param properties: Properties to set, by name.
+        """
+        u, v = edge
+        weight = properties.get(self.WEIGHT_ATTRIBUTE_NAME)
+        if weight is not None and v in self.node_neighbors.get(u, ()):
+            self.node_out_weight[u] += weight - self.edge_weight(edge)
+        labeling.set_edge_properties(self, edge, **properties)
+
+
     def has_edge(self, edge):
         """
         Return whether an edge exists.
@@ -232,7 +275,113 @@ class digraph (basegraph, common, labeling):
         @rtype:  number
         @return: Order of the given node.
         """
-        return len(self.neighbors(node))
+        return self.node_out_degree[node]
+
+
+    def out_degree(self, node):
+        """
+        Return the number of edges leaving the given node.
+
+        @type  node: node
+        @param node: Node identifier
+
+        @rtype:  number
+        @return: Number of nodes directly accessible from the given node.
+        """
+        return self.node_out_degree[node]
+
+
+    def in_degree(self, node):
+        """
+        Return the number of edges arriving at the given node.
+
+        @type  node: node
+        @param node: Node identifier
+
+        @rtype:  number
+        @return: Number of nodes incident to the given node.
+        """
+        return self.node_in_degree[node]
+
+
+    def out_weight(self, node):
+        """
+        Return the total weight of the edges leaving the given node.
+
+        @type  node: node
+        @param node: Node identifier
+
+        @rtype:  number
+        @return: Sum of the weights of the edges leaving the given node.
+        """
+        return self.node_out_weight[node]
+
+
+    def out_degrees(self, nodes=None):
+        """
+        Return the number of edges leaving each of the given nodes, all at once.
+
+        @type  nodes: list
+        @param nodes: Node identifiers. Defaults to every node, in the order of nodes().
+
+        @rtype:  array
+        @return: NumPy array of the out-degree of each node (a list, if NumPy is not
+        available).
+        """
+        return self._bulk(self.node_out_degree, nodes, int)
+
+
+    def in_degrees(self, nodes=None):
+        """
+        Return the number of edges arriving at each of the given nodes, all at once.
+
+        @type  nodes: list
+        @param nodes: Node identifiers. Defaults to every node, in the order of nodes().
+
+        @rtype:  array
+        @return: NumPy array of the in-degree of each node (a list, if NumPy is not
+        available).
+        """
+        return self._bulk(self.node_in_degree, nodes, int)
+
+
+    def out_weights(self, nodes=None):
+        """
+        Return the total weight of the edges leaving each of the given nodes, all at once.
+
+        @type  nodes: list
+        @param nodes: Node identifiers. Defaults to every node, in the order of nodes().
+
+        @rtype:  array
+        @return: NumPy array of the out-weight of each node (a list, if NumPy is not
+        available).
+        """
+        return self._bulk(self.node_out_weight, nodes, float)
+
+
+    def _bulk(self, counters, nodes, dtype):
+        """
+        Return the value of a per-node counter for each of the given nodes.
+
+        @type  counters: dict
+        @param counters: Pairing: Node -> Value, with the nodes in the order of nodes().
+
+        @type  nodes: list
+        @param nodes: Node identifiers, or None for every node.
+
+        @type  dtype: type
+        @param dtype: Type of the NumPy array to return.
+
+        @rtype:  array
+        @return: NumPy array of the values (a list, if NumPy is not available).
+        """
+        if nodes is None:
+            values = list(counters.values())
+        else:
+            values = [counters[node] for node in nodes]
+        if numpy is None:
+            return values
+        return numpy.array(values, dtype=dtype)
 
     def __eq__(self, other):
         """
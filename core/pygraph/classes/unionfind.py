@@ -1,30 +1,165 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class UnionFind:
     """
 	Weighted Union-Find with Path Compression
+
+    Each of the n elements is numbered from 0 to n - 1. The parent and the size of the
+    component of each element are kept in NumPy arrays (lists, without NumPy), which the
+    batch methods work on whole. The methods that work on one element read and write the
+    same arrays through memoryviews, which give plain ints and are much quicker than
+    indexing the arrays one item at a time. Smaller components are always joined under
+    larger ones (union by size), and every find points the elements it passes at their
+    grandparents (path halving).
     """
 
     def __init__(self, n):
-        self._id = list(range(n))
-        self._sz = [1] * n
+        if numpy is None:
+            self._id = list(range(n))
+            self._sz = [1] * n
+            self._ids, self._sizes = self._id, self._sz
+        else:
+            self._id = numpy.arange(n, dtype=numpy.intp)
+            self._sz = numpy.ones(n, dtype=numpy.intp)
+            self._ids, self._sizes = memoryview(self._id), memoryview(self._sz)
+
+    def __len__(self):
+        return len(self._id)
 
     def _root(self, i):
+        ids = self._ids
         j = i
-        while (j != self._id[j]):
-            self._id[j] = self._id[self._id[j]]
-            j = self._id[j]
+        while (j != ids[j]):
+            ids[j] = ids[ids[j]]
+            j = ids[j]
         return j
 
     def find(self, p, q):
         return self._root(p) == self._root(q)
-    
+
     def union(self, p, q):
+        """
+        Join the components of p and q.
+
+        @rtype:  boolean
+        @return: Whether p and q were in different components before.
+        """
         i = self._root(p)
         j = self._root(q)
         if i == j:
-            return
-        if (self._sz[i] < self._sz[j]):
-            self._id[i] = j
-            self._sz[j] += self._sz[i]
+            return False
+        ids, sizes = self._ids, self._sizes
+        if (sizes[i] < sizes[j]):
+            ids[i] = j
+            sizes[j] += sizes[i]
         else:
-            self._id[j] = i
-            self._sz[i] += self._sz[j]
+            ids[j] = i
+            sizes[i] += sizes[j]
+        return True
+
+    def union_many(self, pairs):
+        """
+        Join the components of each pair of elements, all at once.
+
+        With NumPy, the pairs are joined in a few vectorized rounds. Each round finds the
+        roots of both elements of every pair, and hooks one root under the other, ordering
+        them by the size of their components and then by index so the hooks can't form a
+        cycle. When two pairs hook the same root, only one of them takes effect, and the
+        other is tried again in the next round. Without NumPy, union() is called for each
+        pair.
+
+        @type  pairs: array
+        @param pairs: Array (or sequence) of shape (m, 2), of the elements to join.
+        """
+        if numpy is None:
+            for p, q in pairs:
+                self.union(p, q)
+            return
+        pairs = numpy.asarray(pairs, dtype=numpy.intp).reshape(-1, 2)
+        p, q = pairs[:, 0], pairs[:, 1]
+        ids, sizes = self._id, self._sz
+        while len(p) > 0:
+            i = self.find_roots(p)
+            j = self.find_roots(q)
+            apart = i != j
+            p, q, i, j = p[apart], q[apart], i[apart], j[apart]
+            if len(p) == 0:
+                break
+            under = (sizes[i] < sizes[j]) | ((sizes[i] == sizes[j]) & (i < j))
+            involved = numpy.zeros(len(ids), dtype=bool)
+            involved[i] = True
+            involved[j] = True
+            roots = numpy.flatnonzero(involved)
+            counts = sizes[roots]
+            ids[numpy.where(under, i, j)] = numpy.where(under, j, i)
+            # add up the sizes of the components under each root left
+            new_roots = self.find_roots(roots)
+            sizes[new_roots] = 0
+            numpy.add.at(sizes, new_roots, counts)
+
+    def find_roots(self, indices):
+        """
+        Return the root of each of the given elements, all at once. The elements are then
+        pointed straight at their roots.
+
+        @type  indices: array
+        @param indices: Array (or sequence) of elements.
+
+        @rtype:  array
+        @return: Array of the root of each element (a list, without NumPy).
+        """
+        if numpy is None:
+            return [self._root(i) for i in indices]
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+        ids = self._id
+        roots = ids[indices]
+        while True:
+            parents = ids[roots]
+            if (parents == roots).all():
+                break
+            # halve the paths being followed
+            ids[roots] = ids[parents]
+            roots = parents
+        ids[indices] = roots
+        return roots
+
+    def components(self):
+        """
+        Return the component of every element, labelled by the root of the component.
+
+        @rtype:  array
+        @return: Array of the root of each element, from element 0 to n - 1 (a list,
+        without NumPy).
+        """
+        return self.find_roots(range(len(self)))
+
+    def component_size(self, p):
+        """
+        Return the number of elements in the component of p.
+
+        @rtype:  number
+        @return: Size of the component.
+        """
+        return self._sizes[self._root(p)]
+
+    def component_sizes(self, indices=None):
+        """
+        Return the number of elements in the component of each of the given elements.
+
+        @type  indices: array
+        @param indices: Array (or sequence) of elements. Defaults to every element.
+
+        @rtype:  array
+        @return: Array of the size of the component of each element (a list, without
+        NumPy).
+        """
+        if indices is None:
+            indices = range(len(self))
+        roots = self.find_roots(indices)
+        if numpy is None:
+            return [self._sz[root] for root in roots]
+        return self._sz[roots]
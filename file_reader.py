@@ -1,18 +1,146 @@
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
 from core.pygraph.classes.digraph import digraph
 
+from compact_graph import CompactGraph
 from internet_graph import PageVertex, InternetGraph
 
 
-def read_internet_graph(filename):
+# number of bytes of links read from a file at a time
+CHUNK_SIZE = 1 << 22
+
+
+def read_page_ids(f):
+    """Read the ids of the PageVertices from the 1st line of a file.
+
+       Parameters:
+       f(file): a file opened in binary mode, at its beginning
+
+       Returns:
+       List<str>: the page ids, in the order they are listed
+
+    """
+    header = f.readline()
+    if not header.endswith(b'\n'):
+        raise RuntimeError(
+            "Please check that there is a blank line at the end of the file."
+        )
+    page_ids = header[:-1].decode().split(',')
+    for p_id in page_ids:
+        # check that the PageVertex id isn't empty
+        assert len(p_id) != 0, (
+            "Please check that you have no extra commas in the file."
+        )
+    return page_ids
+
+
+def iter_link_chunks(f, page_index, chunk_size=CHUNK_SIZE, progress=None):
+    """Read the links on the 2nd+ lines of a file, a chunk at a time.
+
+       Parameters:
+       f(file): a file opened in binary mode, just past its 1st line
+       page_index(dict): maps each page id to its index
+       chunk_size(int): the number of bytes to read at a time
+       progress(function): if given, called after each chunk as
+                           progress(bytes_read, total_bytes)
+
+       Returns:
+       generator: yields a tuple of two numpy.ndarrays for each chunk,
+                  the indices of the pages where its links originate
+                  and where they end
+
+       Complexity Analysis:
+       Only one chunk of the file is held in memory at a time. Each
+       chunk is checked with vectorized searches for its commas and
+       newlines, and split into ids with single calls to str methods,
+       so the Python work per link is just one dict lookup per id.
+       The runtime is O(L), the number of links in the file.
+
+    """
+    total_bytes = os.fstat(f.fileno()).st_size
+    # part of a line left over from the end of the previous chunk
+    leftover = b''
+    while True:
+        chunk = f.read(chunk_size)
+        if len(chunk) == 0:
+            break
+        chunk = leftover + chunk
+        # only the complete lines are processed
+        end = chunk.rfind(b'\n') + 1
+        chunk, leftover = chunk[:end], chunk[end:]
+        if len(chunk) > 0:
+            yield _parse_links(chunk, page_index)
+        if progress is not None:
+            progress(f.tell() - len(leftover), total_bytes)
+    # check the file ends with a newline
+    if len(leftover) > 0:
+        raise RuntimeError(
+            "Please check that all links have two PageVertices " + 
+            "exactly, and there is a blank line at the end of the " +
+            "file."
+        )
+
+
+def _parse_links(chunk, page_index):
+    """Return the page indices of the links in a chunk of complete lines.
+
+       Parameters:
+       chunk(bytes): lines of the form 'id1,id2\\n'
+       page_index(dict): maps each page id to its index
+
+       Returns:
+       tuple: two numpy.ndarrays, of the indices of the pages where
+              each link originates and where it ends
+
+    """
+    characters = np.frombuffer(chunk, dtype=np.uint8)
+    newlines = np.flatnonzero(characters == ord('\n'))
+    commas = np.flatnonzero(characters == ord(','))
+    line_starts = np.concatenate(([0], newlines[:-1] + 1))
+    # check to make sure all the links have 2 PageVertices, i.e. each
+    # line has exactly one comma, with an id on either side of it
+    if len(commas) != len(newlines) or not (
+        np.all(commas > line_starts) and np.all(commas < newlines - 1)
+    ):
+        raise RuntimeError(
+            "Please check that all links have two PageVertices " + 
+            "exactly, and there is a blank line at the end of the " +
+            "file."
+        )
+    # get ids of the vertices, alternating between the two ends of a link
+    ids = chunk[:-1].decode().replace('\n', ',').split(',')
+    # check to make sure the ids are valid
+    try:
+        indices = np.fromiter(
+            map(page_index.__getitem__, ids), dtype=np.int32, count=len(ids)
+        )
+    except KeyError as error:
+        raise KeyError(f'{error.args[0]} not valid')
+    return indices[0::2], indices[1::2]
+
+
+def read_internet_graph(filename, chunk_size=CHUNK_SIZE, progress=None):
     """Read in data from the specified filename,
        and returns an InternetGraph object corresponding
        to that data.
 
+       The links are streamed from the file in chunks, rather than
+       reading the whole file into memory at once.
+
        Special thanks to Meredith Murphy for providing starter code
        for this function.
 
        Parameters:
        filename (str): The relative path of the file to be processed
+       chunk_size (int): The number of bytes of links to read at a time
+       progress (function): If given, called as
+                            progress(bytes_read, total_bytes) after
+                            each chunk of links is read
 
        Returns:
        InternetGraph: A directed, weighted graph containing the specified
@@ -20,43 +148,162 @@ def read_internet_graph(filename):
 
     """
     # Open the file
-    with open(filename) as f:
-        # read in all lines from the file, without the '\n' characters
-        lines = [line[:-1] for line in f.readlines()]
+    with open(filename, 'rb') as f:
         internet = InternetGraph()
         # Use the 1st line to add the vertices
-        page_ids = lines[0].split(',')
-        for p_id in page_ids:
-            # check that the PageVertex id isn't empty
-            assert len(p_id) != 0, (
-                "Please check that you have no extra commas in the file."
-            )
-            # add the new PageVertex object
+        for p_id in read_page_ids(f):
             internet.add_page_by_id(p_id)
         # Use the 2nd+ line to add the edges
-        for index, line in enumerate(lines):
-            if index >= 1:
-                # get ids of the vertices
-                ids = line.split(',')
-                # check to make sure all the links have 2 PageVertices
-                if len(ids) != 2 or '' in ids:
-                    raise RuntimeError(
-                    "Please check that all links have two PageVertices " + 
-                    "exactly, and there is a blank line at the end of the " +
-                    "file."
-                )
-                # check to make sure the ids are valid
-                page_id1, page_id2 = ids[0], ids[1]
-                if not page_id1 in internet.pages:
-                    raise KeyError(f'{page_id1} not valid')
-                elif not page_id2 in internet.pages:
-                    raise KeyError(f'{page_id2} not valid')
-                # add an edge from the first vertex to the second
-                internet.link_pages(page_id1, page_id2)
+        page_index = internet.adjacency.page_index
+        for sources, targets in iter_link_chunks(
+            f, page_index, chunk_size, progress
+        ):
+            internet.adjacency.add_links(sources, targets)
+        # build the adjacency arrays once all the links are in
+        internet.adjacency.compact()
         # Return the Graph
         return internet
 
 
+"""Saving an InternetGraph to a Binary File"""
+
+# the header holds the magic bytes, the format version, the flags, and the
+# number of pages, links, and bytes of page ids stored
+BINARY_MAGIC = b'PRGRAPH\x00'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<8sIIQQQ')
+# the arrays are little-endian too, whatever the byte order of the machine
+ID_OFFSET_TYPE, OFFSET_TYPE = np.dtype('<u8'), np.dtype('<i8')
+TARGET_TYPE, WEIGHT_TYPE = np.dtype('<i4'), np.dtype('<f8')
+# set in the flags when the weight of each link is stored
+HAS_WEIGHTS = 1
+
+
+class PageIdTable(Sequence):
+    """
+    The page ids of a binary graph file. Each id is only decoded
+    from the file when it is asked for.
+    """
+    def __init__(self, id_offsets, id_bytes):
+        """Initialize attributes of a new PageIdTable instance.
+
+           Parameters:
+           id_offsets(numpy.ndarray): P + 1 offsets, where the i-th id is
+                                      id_bytes[id_offsets[i]:id_offsets[i + 1]]
+           id_bytes(memoryview): the UTF-8 encoded ids, one after another
+
+           Returns: None
+
+        """
+        self._id_offsets = id_offsets
+        self._id_bytes = id_bytes
+
+    def __getitem__(self, index):
+        '''Return the id of the page at an index, or a list for a slice.'''
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        start, end = self._id_offsets[index], self._id_offsets[index + 1]
+        return str(self._id_bytes[start:end], 'utf-8')
+
+    def __len__(self):
+        '''Return the number of page ids.'''
+        return len(self._id_offsets) - 1
+
+
+def _padding(num_bytes):
+    '''Return the bytes needed to align num_bytes to 8 bytes.'''
+    return b'\x00' * (-num_bytes % 8)
+
+
+def write_binary_graph(internet, filename, include_weights=False):
+    """Save an InternetGraph to a file in a compact binary format,
+       which read_binary_graph can load without parsing.
+
+       The file holds a header, then the offset of each page id,
+       the adjacency offsets and targets of the InternetGraph's
+       CompactGraph, the weight of every link (if included), and
+       last the UTF-8 encoded page ids. Each array is aligned
+       to 8 bytes.
+
+       Parameters:
+       internet(InternetGraph): the graph to save
+       filename(str): the path of the file to write
+       include_weights(bool): if True, also store the weight of each link
+
+       Returns: None
+
+    """
+    adjacency = internet.adjacency
+    adjacency.compact()
+    encoded_ids = [str(page_id).encode() for page_id in adjacency.page_ids]
+    id_offsets = np.zeros(len(encoded_ids) + 1, dtype=ID_OFFSET_TYPE)
+    np.cumsum([len(page_id) for page_id in encoded_ids], out=id_offsets[1:])
+    id_bytes = b''.join(encoded_ids)
+    targets = np.ascontiguousarray(adjacency.targets, dtype=TARGET_TYPE)
+    flags = HAS_WEIGHTS if include_weights is True else 0
+    with open(filename, 'wb') as f:
+        f.write(BINARY_HEADER.pack(
+            BINARY_MAGIC, BINARY_VERSION, flags,
+            len(encoded_ids), len(targets), len(id_bytes)
+        ))
+        f.write(id_offsets.tobytes())
+        f.write(np.asarray(adjacency.offsets, dtype=OFFSET_TYPE).tobytes())
+        f.write(targets.tobytes())
+        f.write(_padding(targets.nbytes))
+        if include_weights is True:
+            f.write(adjacency.link_weights().astype(WEIGHT_TYPE).tobytes())
+        f.write(id_bytes)
+    return None
+
+
+def read_binary_graph(filename):
+    """Load an InternetGraph saved by write_binary_graph.
+
+       The file is memory-mapped, and the adjacency arrays of the graph
+       are views of the mapped file, so nothing is copied or parsed up
+       front. The operating system reads in the parts of the file that
+       are used, as they are used. The graph returned is read-only.
+
+       Parameters:
+       filename(str): the path of the file to load
+
+       Returns:
+       InternetGraph: a read-only graph backed by the file
+
+    """
+    with open(filename, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, flags, num_pages, num_links, num_id_bytes = (
+        BINARY_HEADER.unpack_from(mapped)
+    )
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise RuntimeError(f'{filename} is not a binary InternetGraph file.')
+    # find where each array starts in the file
+    position = BINARY_HEADER.size
+
+    def take(dtype, count):
+        '''Return a view of the next array in the file.'''
+        nonlocal position
+        view = np.frombuffer(mapped, dtype=dtype, count=count, offset=position)
+        position += view.nbytes + len(_padding(view.nbytes))
+        return view
+
+    id_offsets = take(ID_OFFSET_TYPE, num_pages + 1)
+    offsets = take(OFFSET_TYPE, num_pages + 1)
+    targets = take(TARGET_TYPE, num_links)
+    weights = None
+    if flags & HAS_WEIGHTS:
+        weights = take(WEIGHT_TYPE, num_links)
+    id_bytes = memoryview(mapped)[position:position + num_id_bytes]
+    adjacency = CompactGraph.from_arrays(
+        PageIdTable(id_offsets, id_bytes), offsets, targets,
+        weights=weights, read_only=True
+    )
+    return InternetGraph(adjacency)
+
+
 def read_pygraph(filename):
     """Read in data from the specified filename,
        and returns an digraph object corresponding
@@ -1,12 +1,20 @@
 import math
 import numpy as np
 from collections import deque
+from heapq import heappush, heappop
+from collections.abc import Mapping
+
+from core.pygraph.algorithms.pagerank import solve_pagerank
+from compact_graph import CompactGraph
+from link_matrix import LinkMatrix
 
 
 class PageVertex:
     """
     Representation of a single web page and its linked pages.
     """
+    __slots__ = ('page_id', 'neighbors', 'link_weight')
+
     def __init__(self, id):
         """Initialize attributes of a new PageVertex instance.
 
@@ -92,17 +100,171 @@ class PageVertex:
         return page_id in self.neighbors
 
 
+class PageVertexView:
+    """
+    A lightweight stand-in for a PageVertex that has been added to an
+    InternetGraph. It only stores the index of the page, and reads the
+    page's id and links out of the graph's CompactGraph.
+    """
+    __slots__ = ('_graph', '_index')
+
+    def __init__(self, graph, index):
+        """Initialize attributes of a new PageVertexView instance.
+
+           Parameters:
+           graph(CompactGraph): where the page and its links are stored
+           index(int): the index of the page in the graph
+
+           Returns: None
+
+        """
+        self._graph = graph
+        self._index = index
+
+    @property
+    def page_id(self):
+        '''Return the id of this vertex.'''
+        return self._graph.page_ids[self._index]
+
+    @property
+    def neighbors(self):
+        '''Return a dict mapping each linked page_id --> PageVertexView.'''
+        return {page.page_id: page for page in self.get_neighbors()}
+
+    @property
+    def link_weight(self):
+        '''Return the weight of each outlink from this page.'''
+        num_links = len(self._graph.neighbors(self._index))
+        return 0 if num_links == 0 else (1 / num_links)
+
+    def add_link(self, page):
+        """Link another PageVertex from this instance.
+           
+           Parameters:
+           page(PageVertex): the PageVertex object the
+                             outlink leads to
+        
+        """
+        target = self._graph.add_page(page.get_id())
+        self._graph.add_link(self._index, target)
+        return None
+
+    def __eq__(self, other):
+        '''Return True if both views are of the same page and graph.'''
+        return (
+            isinstance(other, PageVertexView) and
+            self._graph is other._graph and
+            self._index == other._index
+        )
+
+    def __hash__(self):
+        '''Hash the view by the graph and index of its page.'''
+        return hash((id(self._graph), self._index))
+
+    def __str__(self):
+        '''Output the PageVertex and its linked neighbors.'''
+        neighbor_ids = list(self.neighbors.keys())
+        return f'{self.page_id} adjacent to {neighbor_ids}'
+
+    def __repr__(self):
+        '''Output the list of neighbors of this PageVertex.'''
+        return self.__str__()
+
+    def get_neighbors(self):
+        """Return the PageVertex instances that are linked by 
+           this instance.
+           
+        """
+        return [
+            PageVertexView(self._graph, target)
+            for target in self._graph.neighbors(self._index).tolist()
+        ]
+
+    def get_neighbors_with_weights(self):
+        """Return the PageVertex instances that are linked by 
+           this instance, along with the weight of that link.
+           
+        """
+        return [(n, n.link_weight) for n in self.get_neighbors()]
+
+    def get_id(self):
+        '''Return the id of this vertex.'''
+        return self.page_id
+
+    def has_neighbor(self, page_id):
+        '''Return True or False based on if this Page links to the other.'''
+        target = self._graph.page_index.get(page_id)
+        if target is None:
+            return False
+        return self._graph.has_link(self._index, target)
+
+
+class PageTable(Mapping):
+    """
+    A read-only dict of the pages in an InternetGraph, which maps
+    each page_id --> PageVertexView obj.
+    """
+    def __init__(self, graph):
+        """Initialize attributes of a new PageTable instance.
+
+           Parameters:
+           graph(CompactGraph): where the pages are stored
+
+           Returns: None
+
+        """
+        self._graph = graph
+
+    def __getitem__(self, page_id):
+        '''Return a view of the page with this id.'''
+        return PageVertexView(self._graph, self._graph.page_index[page_id])
+
+    def __iter__(self):
+        '''Iterate over the page ids, in the order they were added.'''
+        return iter(self._graph.page_ids)
+
+    def __len__(self):
+        '''Return the number of pages.'''
+        return len(self._graph)
+
+    def __contains__(self, page_id):
+        '''Return True if a page has this id.'''
+        return page_id in self._graph
+
+
 class InternetGraph:
     """
     Represents a composition of all PageVertex instances
     in the network. Is a directed, weighted, and 
     not neccessarily connected graph. 
 
+    The pages and links are stored by a CompactGraph, which numbers
+    each page and keeps the links between them in NumPy arrays.
+    self.pages still offers each page through the PageVertex interface.
+
     """
-    def __init__(self):
-        '''Construct a new InternetGraph instance.'''
-        # map each page_id --> PageVertex obj
-        self.pages = dict()
+    def __init__(self, adjacency=None):
+        """Construct a new InternetGraph instance.
+
+           Parameters:
+           adjacency(CompactGraph): optional pages and links to start
+                                    with. By default the graph is empty.
+
+           Returns: None
+
+        """
+        # the pages and their outlinks, numbered by page
+        if adjacency is None:
+            adjacency = CompactGraph()
+        self.adjacency = adjacency
+        # map each page_id --> PageVertexView obj
+        self.pages = PageTable(self.adjacency)
+        # how the last PageRank computation converged
+        self.rank_iterations = 0
+        self.rank_residual = None
+        # the rankings and settings of the last compute_inlink_values,
+        # kept for update_rankings
+        self._rank_state = None
 
     def add_page_by_id(self, page_id):
         """Instaniate a new PageVertex, then add to
@@ -115,12 +277,12 @@ class InternetGraph:
            Returns: None
         
         """
-        self.pages[page_id] = PageVertex(page_id)
+        self.adjacency.add_page(page_id)
         return None
 
     def add_page_by_obj(self, page):
-        """Add a PageVertex instance into the dictionary
-           of all PageVertex instances.
+        """Add a PageVertex instance, and its outlinks, into the
+           InternetGraph. The pages it links to are added as well.
 
            Parameters:
            page(PageVertex): the PageVertex to be added
@@ -128,7 +290,10 @@ class InternetGraph:
            Returns: None
         
         """
-        self.pages[page.get_id()] = page
+        source = self.adjacency.add_page(page.get_id())
+        for neighbor_id in page.neighbors:
+            target = self.adjacency.add_page(neighbor_id)
+            self.adjacency.add_link(source, target)
         return None
 
     def get_pages(self):
@@ -177,6 +342,58 @@ class InternetGraph:
         page1_obj.add_link(page2_obj)
         return None
 
+    def unlink_pages(self, page1_id, page2_id):
+        """Removes the link from PageVertex 1 to PageVertex 2.
+
+           Parameters:
+           page1_id(str): the id of the PageVertex where the link originates
+           page2_id(str): the id of the PageVertex where the link ends
+
+           Returns: None
+        
+        """
+        source, target = self._link_indices(page1_id, page2_id)
+        if not self.adjacency.has_link(source, target):
+            raise KeyError(f'No link from {page1_id} to {page2_id}.')
+        self.adjacency.remove_links([source], [target])
+        return None
+
+    def get_inlinks(self, page_id):
+        """Return the ids of the pages that link to a PageVertex.
+
+           Parameters:
+           page_id(str): the id of the PageVertex
+
+           Returns:
+           List<str>: the ids of the pages linking to it, in the order
+                      of self.pages
+
+           Complexity Analysis:
+           The inlinks of every page are kept in an index alongside the
+           outlinks, so this runs in O(k) for a page with k inlinks, once
+           the index is built, plus O(N) to search the N new links not
+           yet merged into it (see CompactGraph.inlinks).
+
+        """
+        self.get_page(page_id)
+        adjacency = self.adjacency
+        inlinks = adjacency.inlinks(adjacency.page_index[page_id])
+        page_ids = adjacency.page_ids
+        return [page_ids[page] for page in inlinks.tolist()]
+
+    def get_in_degree(self, page_id):
+        """Return the number of pages that link to a PageVertex.
+
+           Parameters:
+           page_id(str): the id of the PageVertex
+
+           Returns: int: the number of inlinks it has
+
+        """
+        self.get_page(page_id)
+        adjacency = self.adjacency
+        return len(adjacency.inlinks(adjacency.page_index[page_id]))
+
     def __str__(self):
         '''Return the PageVertexs in this instance.'''
         return f'InternetGraph with PageVertices: {self.get_pages()}'
@@ -184,62 +401,397 @@ class InternetGraph:
 
     """What's the PageRank rating of each page?"""
 
-    def compute_inlink_values(self):
+    def build_link_matrix(self):
+        """Return a sparse matrix of the endorsements between all the
+           PageVertex instances in this graph.
+
+           Parameters: None
+
+           Returns:
+           LinkMatrix: row i holds the link weights of every PageVertex
+                       that links to the i-th page in self.pages
+
+           Complexity Analysis:
+           The rows of the matrix are the inlink index of the adjacency,
+           which only needs building, in O(P + L log L) time, if the
+           links have changed since it was last used. After that, this
+           runs in O(P + L) time, and uses O(P + L) memory.
+
+        """
+        in_offsets, in_sources, order = self.adjacency.inlink_index()
+        # each link carries the inverse of its source's number of outlinks
+        weights = self.adjacency.link_weights()  # O(P + L)
+        return LinkMatrix(
+            in_offsets, in_sources, weights[order], len(self.pages)
+        )
+
+    def compute_inlink_values(self, damping_factor=1.0, tolerance=0.0,
+                              max_iterations=50,
+                              redistribute_dangling=False, initial=None,
+                              solver='power'):
         """Return a dict of the total endorsement given
            to each PageVertex.
 
-           Parameters: None
+           After returning, the number of iterations that were run and
+           the L1 residual of the last one are stored in the
+           rank_iterations and rank_residual attributes.
+
+           Parameters:
+           damping_factor(float): the probability a visitor follows a
+                                  link, rather than jumping to a random
+                                  page. The default of 1.0 never jumps.
+           tolerance(float): stop iterating once the L1 distance between
+                             two consecutive rankings is less than this
+           max_iterations(int): the most iterations to run
+           redistribute_dangling(bool): if True, the endorsement held by
+                                        pages without outlinks is shared
+                                        evenly by all pages, rather than
+                                        being lost
+           initial(dict or numpy.ndarray): rankings to start iterating
+                                           from, such as those from an
+                                           earlier run (see
+                                           _initial_rankings). If None,
+                                           every page starts out equal.
+           solver(str): how to iterate: 'power' for power iteration, or
+                        any other solver in pygraph's
+                        pagerank.SOLVERS, such as 'gauss_seidel',
+                        'extrapolation' or 'adaptive', which usually
+                        need fewer iterations to converge
 
            Returns: 
            list: rankings is an array of the eigenvalues computed from
                  an square matrix of each PageVertex's endorsements
 
            Complexity Analysis:
-           The runtime of this implementation scales quadratically
-           with the size of P, the number of PageVertexs in the InternetGraph.
-
-           It also scales with the size of L, the number of links
-           in the InternetGraph, because that is the sum total of addition
-           operations we will use to calculate the total endorsement 
-           received by each PageVertex.
+           The endorsements are kept in a sparse matrix, which only
+           stores the L links in the InternetGraph rather than all P^2
+           pairs of pages. Building it takes O(P + L log L) time, and
+           each of the (at most max_iterations) iterations that follow
+           is a sparse matrix-vector product taking O(P + L) time.
            
-           This runtime can be expressed in Big O as O(P^2 + L)
+           This runtime can be expressed in Big O as O(P + L log L)
 
         """
+        num_pages = len(self.pages)
         # compute how much endorsement each PageVertex got
-        all_page_ids = list(self.pages.keys())  # O(P)
-        inlinks = list()
-        for page_id1 in all_page_ids:  # P^2 iterations
-            endorsements = list()
-            for page_id2 in all_page_ids:
-                # get the two Page objects
-                pag1, page2 = (
-                    self.get_page(page_id1),
-                    self.get_page(page_id2)
-                )
-                # use outlinks to see endorsements from others
-                if page2.has_neighbor(page_id1) is True:
-                    endorsement_value = page2.link_weight
-                # otherwise no endorsement was given
-                else:
-                    endorsement_value = 0
-                # add the single endorsement 
-                endorsements.append(endorsement_value)
-            # add the PageVertex's total endorsement vector
-            inlinks.append(endorsements)
-        # Rank the sites by finding the "eigenvalues" after 50 iterations
-        rankings = np.array([1/len(self.pages) for page in self.pages]) # O(P)
-        for i in range(50): 
-            rankings = np.dot(inlinks, rankings)  # O(P^2)
+        inlinks = self.build_link_matrix()  # O(P + L log L)
+        # find the pages with no outlinks to pass endorsement along
+        dangling = self.adjacency.out_degrees() == 0  # O(P)
+        # Rank the sites by finding the "eigenvalues" of the matrix
+        rankings = self._initial_rankings(initial)  # O(P)
+        # each iteration is a sparse matrix-vector product, O(P + L)
+        rankings, iterations, residual = solve_pagerank(
+            inlinks, damping_factor,
+            dangling if redistribute_dangling is True else None,
+            rankings, tolerance, max_iterations, solver
+        )
+        self.rank_iterations, self.rank_residual = iterations, residual
+        self._rank_state = {
+            'rankings': rankings,
+            'damping_factor': damping_factor,
+            'redistribute_dangling': redistribute_dangling,
+            # each page's residual is only worked out if it is needed
+            'residuals': None,
+            # the version of the links the residuals were worked out for
+            'version': self.adjacency.version,
+        }
         return rankings
 
-    def bucket_ranked_pages(self, page_eigs):
+    def _initial_rankings(self, initial=None):
+        """Return the rankings to start iterating from.
+
+           Starting from the rankings of an earlier run on a slightly
+           changed InternetGraph takes far fewer iterations to converge
+           than starting over.
+
+           Parameters:
+           initial(dict or numpy.ndarray): either a dict mapping page ids
+                                           to their rankings, or an array
+                                           of rankings in the order of
+                                           self.pages, which may be short
+                                           of pages added since. Pages
+                                           without a ranking start with
+                                           1 / P of the total, and the
+                                           ids of pages no longer in the
+                                           InternetGraph are ignored. If
+                                           None, every page starts at
+                                           1 / P.
+
+           Returns:
+           numpy.ndarray: the starting rankings, scaled to the same total
+                          as the given ones
+
+        """
+        num_pages = len(self.pages)
+        if initial is None:
+            return np.full(num_pages, 1 / num_pages)
+        if isinstance(initial, dict):
+            # keep the total the rankings had, which is less than 1 when
+            # endorsement is lost at pages without outlinks
+            total = sum(initial.values())
+            rankings = np.full(num_pages, total / num_pages)
+            page_index = self.adjacency.page_index
+            for page_id, ranking in initial.items():
+                index = page_index.get(page_id)
+                if index is not None:
+                    rankings[index] = ranking
+        else:
+            initial = np.asarray(initial, dtype=np.float64)
+            total = initial.sum()
+            rankings = np.full(num_pages, total / num_pages)
+            rankings[:len(initial)] = initial[:num_pages]
+        if not rankings.sum() > 0:
+            return np.full(num_pages, 1 / num_pages)
+        rankings *= total / rankings.sum()
+        return rankings
+
+    def _rank_step(self, inlinks, dangling, rankings, damping_factor,
+                   redistribute_dangling):
+        """Return the rankings after one more power iteration.
+
+           Parameters:
+           inlinks(LinkMatrix): the matrix from build_link_matrix
+           dangling(numpy.ndarray): True for each page without outlinks
+           rankings(numpy.ndarray): the current rankings
+           damping_factor(float): the probability a visitor follows a link
+           redistribute_dangling(bool): share the endorsement of pages
+                                        without outlinks among all pages
+
+           Returns: numpy.ndarray: the next rankings
+
+        """
+        num_pages = len(rankings)
+        next_rankings = damping_factor * inlinks.dot(rankings)  # O(P + L)
+        if redistribute_dangling is True:
+            lost = rankings[dangling].sum()
+            next_rankings += damping_factor * lost / num_pages
+        # endorsement every page receives from random jumps
+        next_rankings += (1 - damping_factor) / num_pages
+        return next_rankings
+
+    def update_rankings(self, added_links=(), removed_links=(),
+                        tolerance=1e-10, max_iterations=1000):
+        """Add and remove links, then update the rankings found by the
+           last call to compute_inlink_values, without starting over.
+
+           The difference between each page's ranking and the endorsement
+           it would receive from the current rankings is its residual. A
+           link change only alters the residuals of the pages linked from
+           the page it starts at, so just those are worked out, and then
+           the pages with large residuals repeatedly take them into their
+           rankings and pass them on along their outlinks, until every
+           residual is small. If links were changed some other way since
+           the rankings were found, every residual is worked out again.
+
+           After returning, the number of rounds of passing residuals on,
+           and the final L1 residual, are stored in the rank_iterations
+           and rank_residual attributes.
+
+           Parameters:
+           added_links(List<tuple<str, str>>): (page1_id, page2_id) for
+                                               each link to add
+           removed_links(List<tuple<str, str>>): (page1_id, page2_id) for
+                                                 each link to remove
+           tolerance(float): stop once the L1 norm of the residuals is
+                             at most this
+           max_iterations(int): the most rounds to run
+
+           Returns:
+           numpy.ndarray: the updated rankings, as compute_inlink_values
+                          would return them
+
+           Complexity Analysis:
+           The first update after compute_inlink_values works out every
+           residual, in O(P + L log L). After that, the links are changed
+           without rebuilding the adjacency arrays: adding C links costs
+           O(C), and removing them shifts the arrays down, in O(P + L)
+           with a small constant. Each round then costs O(P + L' log L'),
+           where L' is the number of outlinks of the pages passing their
+           residuals on - usually a small part of the InternetGraph.
+
+        """
+        state = self._rank_state
+        if state is None or state['damping_factor'] >= 1:
+            raise RuntimeError(
+                'Please call compute_inlink_values with a damping_factor ' +
+                'below 1 before updating the rankings.'
+            )
+        damping_factor = state['damping_factor']
+        redistribute_dangling = state['redistribute_dangling']
+        adjacency = self.adjacency
+        # check the pages, and the links to remove, exist
+        added = [self._link_indices(*link) for link in added_links]
+        removed = [self._link_indices(*link) for link in removed_links]
+        num_pages = len(adjacency)
+        if len(removed) > 0:
+            sources, targets = np.array(removed, dtype=np.int64).T
+            pages = np.unique(sources)
+            links, counts = adjacency.neighbors_of_many(pages)
+            found = np.isin(
+                sources * num_pages + targets,
+                np.repeat(pages, counts) * num_pages + links
+            )
+            if not found.all():
+                page1_id, page2_id = removed_links[np.argmin(found)]
+                raise KeyError(f'No link from {page1_id} to {page2_id}.')
+        # links changed some other way, since the residuals were worked
+        # out, means working them out again
+        residuals = state['residuals']
+        if adjacency.version != state['version']:
+            residuals = None
+        # remember the outlinks of each page whose outlinks will change
+        changed = np.unique(
+            np.array([source for source, _ in added + removed], dtype=np.int64)
+        )
+        old_links = adjacency.neighbors_of_many(changed)
+        if len(added) > 0:
+            adjacency.add_links(*np.array(added, dtype=np.int32).T)
+        if len(removed) > 0:
+            adjacency.remove_links(*np.array(removed, dtype=np.int32).T)
+        rankings = state['rankings'].copy()
+        if residuals is None or len(residuals) != num_pages:
+            # new pages have no ranking yet, and change every page's
+            # share of the random jumps, so find every residual afresh
+            rankings = np.concatenate(
+                (rankings, np.zeros(num_pages - len(rankings)))
+            )
+            residuals = self._rank_step(
+                self.build_link_matrix(), adjacency.out_degrees() == 0,
+                rankings, damping_factor, redistribute_dangling
+            ) - rankings  # O(P + L log L)
+        else:
+            residuals = residuals.copy()
+            # take away the old endorsements of each changed page, and
+            # give the new ones
+            shared = 0.0
+            for (links, counts), sign in (
+                (old_links, -1), (adjacency.neighbors_of_many(changed), 1)
+            ):
+                endorsements = sign * damping_factor * rankings[changed]
+                residuals += np.bincount(
+                    links,
+                    np.repeat(endorsements / np.maximum(counts, 1), counts),
+                    minlength=num_pages
+                )
+                if redistribute_dangling is True:
+                    shared += endorsements[counts == 0].sum() / num_pages
+            residuals += shared
+        # pass the residuals on until they are all small
+        degrees = adjacency.out_degrees(compact=False)
+        rounds = 0
+        while rounds < max_iterations:
+            pushing = np.flatnonzero(np.abs(residuals) > tolerance / num_pages)
+            if len(pushing) == 0:
+                break
+            pushed = residuals[pushing]
+            rankings[pushing] += pushed
+            residuals[pushing] = 0
+            counts = degrees[pushing]
+            shares = damping_factor * pushed / np.maximum(counts, 1)
+            if len(pushing) > num_pages // 4:
+                # most pages are pushing, so go over every link at once
+                all_shares = np.zeros(num_pages)
+                all_shares[pushing] = shares
+                residuals += adjacency.sum_over_inlinks(all_shares)
+            else:
+                neighbors, _ = adjacency.neighbors_of_many(pushing)
+                residuals += np.bincount(
+                    neighbors, np.repeat(shares, counts), minlength=num_pages
+                )
+            if redistribute_dangling is True:
+                lost = pushed[counts == 0].sum()
+                residuals += damping_factor * lost / num_pages
+            rounds += 1
+        self.rank_iterations = rounds
+        self.rank_residual = np.abs(residuals).sum()
+        state['rankings'], state['residuals'] = rankings, residuals
+        state['version'] = adjacency.version
+        return rankings.copy()
+
+    def _link_indices(self, page1_id, page2_id):
+        """Return the indices of the pages at either end of a link,
+           or raise a KeyError if either page is missing.
+
+        """
+        self.get_page(page1_id), self.get_page(page2_id)
+        page_index = self.adjacency.page_index
+        return page_index[page1_id], page_index[page2_id]
+
+    def bucket_rankings(self, rankings, num_ratings=10, by_quantile=False):
+        """Give every page a PageRank rating, straight from the
+           rankings vector.
+
+           Parameters:
+           rankings(numpy.ndarray): the eigenvalue of each page, in the
+                                    order of self.pages
+           num_ratings(int): the number of ratings to give out, where 1
+                             is the highest
+           by_quantile(bool): if False, the pages are split into
+                              num_ratings buckets of equal size (the last
+                              may be smaller) by their position in the
+                              sorted order. If True, the buckets are split
+                              at the quantiles of the eigenvalues instead,
+                              so pages with equal eigenvalues always share
+                              a rating, and buckets may differ in size.
+
+           Returns:
+           tuple: two numpy.ndarrays,
+                  - order: the index of each page, from the greatest
+                    eigenvalue to the least (ties keep the order of
+                    self.pages)
+                  - ratings: the rating given to the page at each index
+
+           Complexity Analysis:
+           All the pages are sorted at once by np.argsort, and rated
+           with vectorized arithmetic (or a binary search of the
+           num_ratings - 1 quantiles), so the runtime is O(P log P).
+
+        """
+        rankings = np.asarray(rankings)
+        num_rankings = len(rankings)
+        # sort the pages by the greatest eig values
+        order = np.argsort(-rankings, kind='stable')  # O(P log P)
+        ratings = np.empty(num_rankings, dtype=np.int32)
+        if by_quantile is True:
+            # the eigenvalues that separate each rating from the next
+            cutoffs = np.quantile(
+                rankings, np.arange(1, num_ratings) / num_ratings
+            )
+            ratings[:] = num_ratings - np.searchsorted(
+                cutoffs, rankings, side='right'
+            )
+        else:
+            # compute length of each rating "bucket"
+            bucket_len = max(math.ceil(num_rankings / num_ratings), 1)
+            ratings[order] = np.arange(num_rankings) // bucket_len + 1
+        return order, ratings
+
+    def _group_ratings(self, page_ids, order, ratings):
+        """Return a dict mapping each rating to a list of the page ids
+           with that rating, from the arrays made by bucket_rankings.
+
+        """
+        sorted_ratings = ratings[order]
+        # the ratings only increase along the sorted order
+        bounds = np.flatnonzero(np.diff(sorted_ratings)) + 1
+        rating_pages = dict()
+        for bucket in np.split(order, bounds):
+            if len(bucket) > 0:
+                rating = int(ratings[bucket[0]])
+                rating_pages[rating] = [page_ids[i] for i in bucket.tolist()]
+        return rating_pages
+
+    def bucket_ranked_pages(self, page_eigs, num_ratings=10,
+                            by_quantile=False):
         """Return a list of tuples for each PageVertex,
            along with its PageRank rating.
 
            Parameters: 
            page_eigs(dict): hash map between page ids and 
                            their eigenvalues
+           num_ratings(int): the number of ratings to give out
+           by_quantile(bool): split the ratings at quantiles of the
+                              eigenvalues (see bucket_rankings)
            
            Returns: 
            dict: each PR rating is mapped to a list
@@ -251,36 +803,34 @@ class InternetGraph:
            id expressed in Big O as O(P log P).
 
         """
-        # store variables for number of pages to rank 
-        num_rankings = len(page_eigs)  # O(P)
-        # store possible ratings we can give out (scale 1-10)
-        num_possible_ranks = 10
-        # compute length of each rating "bucket"
-        bucket_len = math.ceil(num_rankings / num_possible_ranks)  # O(1)
-        # sort the pages by the greatest eig values
-        sorted_pages = list(page_eigs.items())
-        sorted_pages.sort(reverse=True, key=lambda p_eig: p_eig[1])  # O(P log P)
-        # map each rating to a list of the appropiate pages
-        rating_pages = dict()
-        for rating in range(1, num_possible_ranks + 1):  # 10 iterations
-            # store a list of the page ids 
-            pages = list()
-            # compute indices of the pages we want
-            start = 0 + (bucket_len * (rating - 1))
-            end = start + bucket_len
-            # add the pages in that bucket
-            for page, eig in sorted_pages[start:end]:  # O(P / 10) in total
-                pages.append(page)
-            # map to the rating - if we haven't already added all pages
-            if len(pages) > 0:
-                rating_pages[rating] = pages
-        return rating_pages
+        page_ids = list(page_eigs)
+        rankings = np.fromiter(
+            page_eigs.values(), dtype=np.float64, count=len(page_ids)
+        )
+        order, ratings = self.bucket_rankings(
+            rankings, num_ratings, by_quantile
+        )
+        return self._group_ratings(page_ids, order, ratings)
 
-    def rank_pages(self):
+    def rank_pages(self, damping_factor=1.0, tolerance=0.0,
+                   max_iterations=50, redistribute_dangling=False,
+                   num_ratings=10, by_quantile=False, initial=None,
+                   solver='power'):
         """
         Return the PageRank rating for each page.
 
-        Parameters: None
+        Parameters:
+        damping_factor(float): the probability a visitor follows a link
+        tolerance(float): L1 change in the rankings to stop iterating at
+        max_iterations(int): the most iterations to run
+        redistribute_dangling(bool): share the endorsement of pages
+                                     without outlinks among all pages
+        initial(dict or numpy.ndarray): rankings to start from
+        solver(str): the PageRank solver to iterate with
+        (see compute_inlink_values for more detail on each)
+        num_ratings(int): the number of ratings to give out
+        by_quantile(bool): split the ratings at quantiles of the
+                           eigenvalues (see bucket_rankings)
 
         Returns:
         List<tuple<str, int>>: tuples in the form (str: page_id, int: rating), 
@@ -295,16 +845,215 @@ class InternetGraph:
         asymptotically, which represent the number of PageVertexs and the 
         total number of links in the InternetGraph respectively. The Big O
         notation for the combined runtime of the three helper methods
-        would be O(P^2 + L).
+        would be O(P log P + L log L).
 
         """
         # compute eigenvalues of alll pages
-        rankings_vector = self.compute_inlink_values()
-        # map all pages to their eigenvalues
-        page_eigs = dict(zip(list(self.pages), rankings_vector)) 
+        rankings_vector = self.compute_inlink_values(
+            damping_factor, tolerance, max_iterations, redistribute_dangling,
+            initial, solver
+        )
         # convert to list of PageRank ratings
-        rating_pages = self.bucket_ranked_pages(page_eigs)  # O(P log P)
-        return rating_pages
+        order, ratings = self.bucket_rankings(
+            rankings_vector, num_ratings, by_quantile
+        )  # O(P log P)
+        return self._group_ratings(self.adjacency.page_ids, order, ratings)
+
+    def top_k_pages(self, k, rankings=None):
+        """Return the k pages with the greatest eigenvalues, without
+           sorting all of the pages.
+
+           Parameters:
+           k(int): the number of pages to return
+           rankings(numpy.ndarray): the eigenvalue of each page, as
+                                    returned by compute_inlink_values.
+                                    If not given, it is computed with the
+                                    default settings.
+
+           Returns:
+           List<tuple<str, float>>: (page_id, eigenvalue) for the top k
+               pages, from the greatest eigenvalue to the least. Pages with
+               equal eigenvalues are ordered as they are in self.pages.
+
+           Complexity Analysis:
+           np.argpartition finds the k greatest eigenvalues in O(P) time,
+           and only those k are then sorted, so the runtime is
+           O(P + k log k) rather than O(P log P).
+
+        """
+        if rankings is None:
+            rankings = self.compute_inlink_values()
+        rankings = np.asarray(rankings)
+        k = min(k, len(rankings))
+        if k <= 0:
+            return list()
+        # the k-th greatest eigenvalue
+        cutoff = -np.partition(-rankings, k - 1)[k - 1]  # O(P)
+        # take every page above the cutoff, and the earliest pages tied at it
+        above = np.flatnonzero(rankings > cutoff)
+        tied = np.flatnonzero(rankings == cutoff)[:k - len(above)]
+        chosen = np.concatenate((above, tied))
+        # sort the chosen pages by eigenvalue, then by index
+        chosen = chosen[np.lexsort((chosen, -rankings[chosen]))]  # O(k log k)
+        page_ids = self.adjacency.page_ids
+        return [(page_ids[i], float(rankings[i])) for i in chosen.tolist()]
+
+    def personalized_rank(self, seeds, damping_factor=0.85, tolerance=1e-6):
+        """Return the PageRank of pages personalized to a few seed pages,
+           where every random jump lands back on one of the seeds.
+
+           The scores are approximated by forward push: each seed starts
+           with some residual endorsement, and a page whose residual is
+           large enough keeps (1 - damping_factor) of it as its score and
+           pushes the rest along its outlinks. A page without outlinks
+           pushes it back to the seeds. Only the pages the pushes reach
+           are ever looked at.
+
+           Parameters:
+           seeds(dict): maps the id of each seed page to its weight in
+                        the teleport distribution (weights needn't sum
+                        to 1; they are normalized, so their total must
+                        be positive)
+           damping_factor(float): the probability a visitor follows a link
+           tolerance(float): pages stop pushing once their residual is
+                             less than tolerance times their number of
+                             outlinks, so each score is within tolerance
+                             (per outlink) of the exact value
+
+           Returns:
+           dict: maps the id of each page reached to its score. Pages
+                 not in the dict have a score of about 0.
+
+           Complexity Analysis:
+           Each push removes at least (1 - damping_factor) * tolerance of
+           endorsement per outlink touched, so the runtime is
+           O(1 / ((1 - damping_factor) * tolerance)), no matter how many
+           pages P or links L the InternetGraph has.
+
+        """
+        self._check_seeds(seeds)
+        adjacency = self.adjacency
+        adjacency.compact()
+        offsets, targets = adjacency.offsets, adjacency.targets
+        # the teleport distribution, by page index
+        total_weight = sum(seeds.values())
+        teleport = {
+            adjacency.page_index[page_id]: weight / total_weight
+            for page_id, weight in seeds.items()
+        }
+        scores = dict()
+        residuals = dict(teleport)
+        queue = deque(teleport)
+        queued = set(teleport)
+        while len(queue) > 0:
+            page = queue.popleft()
+            queued.discard(page)
+            start, end = int(offsets[page]), int(offsets[page + 1])
+            residual = residuals[page]
+            if residual < tolerance * max(end - start, 1):
+                continue
+            # keep part of the residual, and pass on the rest
+            residuals[page] = 0
+            scores[page] = scores.get(page, 0) + (1 - damping_factor) * residual
+            passed = damping_factor * residual
+            if end > start:
+                share = passed / (end - start)
+                receivers = [(n, share) for n in targets[start:end].tolist()]
+            else:
+                receivers = [(s, passed * w) for s, w in teleport.items()]
+            for neighbor, amount in receivers:
+                residuals[neighbor] = residuals.get(neighbor, 0) + amount
+                num_links = int(offsets[neighbor + 1] - offsets[neighbor])
+                if neighbor not in queued and (
+                    residuals[neighbor] >= tolerance * max(num_links, 1)
+                ):
+                    queue.append(neighbor)
+                    queued.add(neighbor)
+        page_ids = adjacency.page_ids
+        return {page_ids[page]: score for page, score in scores.items()}
+
+    def _check_seeds(self, seeds):
+        """Raise a KeyError if any seed page is missing, or a ValueError
+           if the seeds have no weight to share out between them.
+
+        """
+        for page_id in seeds:
+            if not self.contains_page(page_id):
+                raise KeyError(f'{page_id} not found in InternetGraph!')
+        if not sum(seeds.values()) > 0:
+            raise ValueError(
+                'Please give the seed pages a positive total weight.'
+            )
+
+    def personalized_rank_many(self, seed_sets, damping_factor=0.85,
+                               tolerance=1e-8, max_iterations=100):
+        """Return the personalized PageRank of every page, for many sets
+           of seed pages at once.
+
+           The scores for all the seed sets are kept as the columns of a
+           P x B matrix, and each iteration multiplies the whole block by
+           the sparse matrix of endorsements in one pass, so the links
+           are only read once per iteration for the whole batch. A column
+           stops being updated as soon as it has converged.
+
+           After returning, the number of iterations run for each column,
+           and its final L1 residual, are stored in the rank_iterations and
+           rank_residual attributes as arrays.
+
+           Parameters:
+           seed_sets(List<dict>): B dicts, each mapping the ids of its seed
+                                  pages to their weights (as in
+                                  personalized_rank)
+           damping_factor(float): the probability a visitor follows a link
+           tolerance(float): a column stops once the L1 distance between
+                             two of its consecutive rankings is less
+                             than this
+           max_iterations(int): the most iterations to run
+
+           Returns:
+           numpy.ndarray: a P x B matrix, where column b holds the scores
+                          of every page (in the order of self.pages) for
+                          the b-th set of seeds
+
+           Complexity Analysis:
+           Each iteration takes O((P + L) * B') time, where B' is the
+           number of columns that haven't converged yet, so the runtime
+           is O(P + L log L + (P + L) * B * max_iterations) at worst.
+
+        """
+        for seeds in seed_sets:
+            self._check_seeds(seeds)
+        num_pages, num_sets = len(self.pages), len(seed_sets)
+        page_index = self.adjacency.page_index
+        # the teleport distribution of each seed set, as a column
+        teleport = np.zeros((num_pages, num_sets))
+        for column, seeds in enumerate(seed_sets):
+            for page_id, weight in seeds.items():
+                teleport[page_index[page_id], column] = weight
+        teleport /= teleport.sum(axis=0)
+        inlinks = self.build_link_matrix()  # O(P + L log L)
+        dangling = self.adjacency.out_degrees() == 0
+        rankings = teleport.copy()
+        iterations = np.zeros(num_sets, dtype=np.int64)
+        residuals = np.full(num_sets, np.inf)
+        # the columns that are still converging
+        active = np.arange(num_sets)
+        while len(active) > 0 and iterations[active[0]] < max_iterations:
+            current = rankings[:, active]
+            # endorsement lost at pages without outlinks, and random jumps,
+            # both go back to the seeds
+            returned = damping_factor * current[dangling].sum(axis=0)
+            next_rankings = damping_factor * inlinks.dot(current)
+            next_rankings += (returned + (1 - damping_factor)) * (
+                teleport[:, active]
+            )
+            residuals[active] = np.abs(next_rankings - current).sum(axis=0)
+            rankings[:, active] = next_rankings
+            iterations[active] += 1
+            # drop the columns that have converged
+            active = active[residuals[active] >= tolerance]
+        self.rank_iterations, self.rank_residual = iterations, residuals
+        return rankings
 
     """What pages can I reach N links away from this page?"""
 
@@ -334,110 +1083,297 @@ class InternetGraph:
         List<str>: All PageVertex ids that are 'link_distance' away
 
         Complexity Analysis:
-        This function attempts to process each PageVertex, by way of 
-        each link in the InternetGraph. It scales in linear proportion to 
-        P and L as they grow asymptotically larger, therefore
-        the Big O notation of this function is O(P + L).
-
-        """
-        # check to make sure we have a valid start_id
-        if not self.contains_page(start_id):
-            raise KeyError(f"PageVertex {start_id}.")
-        # Store the starting page in a variable 
-        start_page_obj = self.get_page(start_id)
-        # Keep a count of steps taken from start so far
-        steps = -1
-        # Keep a dict of PageVertex ids, mapped to their distance from start
-        page_distances = dict()
-        # queue of vertices to visit next
-        queue = deque() 
-        queue.append(start_page_obj)
-        # Perform a BFS
-        while steps < link_distance:
-            # init a list of neighbors to process next
-            neighbors = list()
-            # Dequeue all the pages in the queue
-            while len(queue) > 0:
-                current_page_obj = queue.popleft()
-                current_page_id = current_page_obj.get_id()
-                # add the current PageVertex to the dict
-                if current_page_id not in page_distances:
-                    page_distances[current_page_id] = steps + 1
-                # Keep track of page to process on next iteration
-                neighbors.extend(current_page_obj.get_neighbors())
-            # enqueue the vertices to visit on the next iteration
-            for neighbor in neighbors:
-                queue.append(neighbor)
-            # Increment the steps taken so far
-            steps += 1
-        # Return the ids of pages, target distance away
-        pages_n_away = list()
-        for page_id in page_distances:
-            if page_distances[page_id] == link_distance:
-                pages_n_away.append(page_id)
-        return pages_n_away
+        See find_pages_up_to_n_away, which does the search. In the
+        worst case it is O(P + L).
+
+        """
+        levels = self.find_pages_up_to_n_away([start_id], link_distance)
+        # no page is a negative number of links away
+        return levels[-1] if len(levels) > 0 else list()
+
+    def find_pages_up_to_n_away(self, start_ids, link_distance):
+        """
+        Find the pages at each distance from a group of start pages,
+        up to n links away. A page's distance is the fewest links it
+        takes to reach it from any one of the start pages.
+
+        Parmeters:
+        start_ids (List<str>): The ids of the start PageVertices.
+        link_distance (int): The furthest distance from the 
+                             start vertices we want
+
+        Returns:
+        List<List<str>>: a list of link_distance + 1 lists, where the
+            list at index d holds the ids of all PageVertices that are d
+            links away, in the order they were first reached. Index 0
+            holds the start pages. If link_distance is negative, the
+            list is empty.
+
+        Complexity Analysis:
+        The search runs one level at a time. All the outlinks of the
+        pages found on one level are gathered from the adjacency arrays
+        at once, and those already visited are filtered out with an
+        array of flags, one per page. Each page joins at most one level,
+        and the outlinks of each page are read at most once, so the
+        runtime is O(P + L) in the worst case, and usually far less since
+        the search stops after link_distance levels.
+
+        """
+        # check to make sure we have valid start_ids
+        for start_id in start_ids:
+            if not self.contains_page(start_id):
+                raise KeyError(f"PageVertex {start_id}.")
+        adjacency = self.adjacency
+        # Keep track of the pages that have already been reached
+        visited = np.zeros(len(adjacency), dtype=bool)
+        frontier = _first_occurrences(np.fromiter(
+            (adjacency.page_index[start_id] for start_id in start_ids),
+            dtype=np.int32, count=len(start_ids)
+        ))
+        visited[frontier] = True
+        levels = [frontier]
+        # Perform a BFS, one level at a time
+        while len(levels) <= link_distance:
+            # gather the outlinks of every page on this level
+            reached, _ = adjacency.neighbors_of_many(frontier)
+            # the next level is made of the pages not visited before
+            frontier = _first_occurrences(reached[~visited[reached]])
+            visited[frontier] = True
+            levels.append(frontier)
+        # Return the ids of pages at each distance, none if it's negative
+        levels = levels[:max(link_distance + 1, 0)]
+        page_ids = adjacency.page_ids
+        return [[page_ids[page] for page in level.tolist()] for level in levels]
 
     """What's the Shortest Weighted Path Between 2 PageVertexs (by links)?"""
 
-    def find_shortest_path(self, start_id, target_id):
+    def find_shortest_path(self, start_id, target_id=None,
+                           bidirectional=False):
         """
         Use Dijkstra's Algorithm to return the total weight
         of the shortest path from a start page 
-        to a destination.
+        to a destination, along with the path itself.
+
+        The weight of a link is the link_weight of the PageVertex
+        it leads to.
 
         Parameters:
         start_id(str): the id of the PageVertex where the path begins
-        target_id(str): the id of the PageVertex where the path ends
+        target_id(str): the id of the PageVertex where the path ends.
+                        If None, the shortest paths to all the pages
+                        reachable from the start are found instead.
+        bidirectional(bool): if True, search backward from the target
+                             at the same time as forward from the start
+                             (see _bidirectional_path). Only used when
+                             target_id is given.
 
         Returns:
-        float: the total weight of the edges along the shortest path
-               from the starting to target PageVertex
+        tuple<float, List<str>>: the total weight of the edges along the
+            shortest path from the starting to target PageVertex, and the
+            ids of the pages on that path (starting with start_id). If the
+            target can't be reached, this is (inf, []).
 
-        Complexity Analysis:
-        The runtime of this method asymptotically increases quadratically 
-        with respect to P, the number of PageVertexs. The longest step is
-        finding the minimum PageVertex to add, since an ordinary array is
-        currently used to simulate using a binary min heap.
+        If target_id is None, returns
+        tuple<dict, dict>: the first maps each reachable page id to its
+            shortest distance from the start, and the second maps it to
+            the id of the page before it on that path (None for start_id).
 
-        Overall, the runtime of this method is O(P^2).
+        Complexity Analysis:
+        The PageVertices waiting to be visited are kept in a binary min
+        heap. Instead of updating a page's place in the heap when a
+        shorter distance to it is found, the page is pushed again and
+        the longer entry is skipped when it is popped. Each of the L
+        links causes at most one push, so the runtime of this method
+        is O(P + L log L). The search also stops as soon as the target
+        PageVertex is reached.
 
         """
         # Check that both start and target PageVertexs valid
-        if self.contains_page(start_id) is False:  # O(P)
+        if self.contains_page(start_id) is False:  # O(1)
             raise KeyError(f'{start_id} not found in InternetGraph!')
-        elif self.contains_page(target_id) is False:  # O(P)
+        elif target_id is not None and self.contains_page(target_id) is False:
             raise KeyError(f'{target_id} not found in InternetGraph!')
-        # A: initialize all page distances to INFINITY away
-        page_weight = dict()  # O(1)
-        for page_obj in self.pages.values():  # P iterations
-            page_weight[page_obj] = float('inf')
+        adjacency = self.adjacency
+        start = adjacency.page_index[start_id]
+        target = adjacency.page_index.get(target_id)
+        if bidirectional is True and target is not None:
+            return self._bidirectional_path(start, target)
+        adjacency.compact()
+        offsets, targets = adjacency.offsets, adjacency.targets
+        # A: only pages that have been reached are given a distance
+        page_weight = {start: 0}
+        previous = {start: None}
+        queue = [(0, start)]
         # B: Calculate Shortest Paths from Start PageVertex
-        start_page = self.pages[start_id]  # O(1)
-        page_weight[start_page] = 0
-        while len(list(page_weight.items())) > 0:  # P iterations
+        while len(queue) > 0:
             # Get the minimum-distance remaining PageVertex
-            min_distance = min(list(page_weight.values()))  # O(P)
-            min_page = None
-            # find the minumum-weighted PageVertex
-            for page in page_weight:  # P iterations
-                if page_weight[page] == min_distance:
-                    min_page = page
-            # If target found, return its distance
-            if min_page.page_id == target_id:
-                return page_weight[min_page]
-            # B: List the PageVertex's neighbors
-            neighbor_weights = min_page.get_neighbors_with_weights()  # O(L)
+            min_distance, min_page = heappop(queue)  # O(log L)
+            # skip entries that a shorter path has replaced
+            if min_distance > page_weight[min_page]:
+                continue
+            # If target found, stop searching
+            if min_page == target:
+                break
             # C: Update the PageVertex's neighbors
-            for neighbor, weight in neighbor_weights:
-                if neighbor in page_weight:
-                    current_distance = page_weight[neighbor]
-                    # Update ONLY to reduce the weight of the distance
-                    new_dist = weight + page_weight[min_page]
-                    if new_dist < current_distance:
-                        page_weight[neighbor] = new_dist
-            # remove the min weighted page from the dict
-            del page_weight[min_page]
+            start_link, end_link = offsets[min_page], offsets[min_page + 1]
+            for neighbor in targets[start_link:end_link].tolist():
+                num_links = int(offsets[neighbor + 1] - offsets[neighbor])
+                weight = 0 if num_links == 0 else (1 / num_links)
+                # Update ONLY to reduce the weight of the distance
+                new_dist = weight + min_distance
+                if neighbor not in page_weight or (
+                    new_dist < page_weight[neighbor]
+                ):
+                    page_weight[neighbor] = new_dist
+                    previous[neighbor] = min_page
+                    heappush(queue, (new_dist, neighbor))
+        page_ids = adjacency.page_ids
+        # return the distances to every page reached
+        if target is None:
+            return (
+                {page_ids[page]: page_weight[page] for page in page_weight},
+                {
+                    page_ids[page]: (
+                        None if before is None else page_ids[before]
+                    )
+                    for page, before in previous.items()
+                }
+            )
+        if target not in page_weight:
+            return float('inf'), list()
+        # walk back from the target to list the pages on the path
+        path = list()
+        page = target
+        while page is not None:
+            path.append(page_ids[page])
+            page = previous[page]
+        path.reverse()
+        return page_weight[target], path
+
+    def _bidirectional_path(self, start, target):
+        """
+        Return the shortest path between two pages, given by their
+        indices, as find_shortest_path does, using bidirectional
+        Dijkstra's Algorithm.
+
+        One search runs forward from the start along outlinks, and the
+        other runs backward from the target along inlinks, read from the
+        inlink index of the adjacency. Each step advances the search
+        whose next page is nearer. Whenever a link joins pages reached by
+        both searches, the path through it is a candidate, and the
+        searches stop once the nearest pages left in their two heaps are
+        together no closer than the best candidate.
+
+        Parameters:
+        start(int): the index of the page where the path begins
+        target(int): the index of the page where the path ends
+
+        Returns:
+        tuple<float, List<str>>: as find_shortest_path returns it
 
+        Complexity Analysis:
+        In the worst case this is still O(P + L log L), plus the time to
+        build the inlink index if the links have changed. Links added
+        since the adjacency arrays were last rebuilt are read from the
+        buffer once, rather than rebuilding the arrays. In practice
+        each search only reaches pages about half as far away as the
+        target, which is usually a small part of the pages a one-way
+        search would settle.
+
+        """
+        adjacency = self.adjacency
+        offsets, targets = adjacency.offsets, adjacency.targets
+        in_offsets, in_sources, _ = adjacency.inlink_index(stored_only=True)
+        num_stored = len(offsets) - 1
+        # the links still in the buffer, by the page at either end
+        new_outlinks, new_inlinks = dict(), dict()
+        new_sources, new_targets = adjacency.pending_links()
+        for source, page in zip(new_sources.tolist(), new_targets.tolist()):
+            new_outlinks.setdefault(source, list()).append(page)
+            new_inlinks.setdefault(page, list()).append(source)
+        page_ids = adjacency.page_ids
+        if start == target:
+            return 0, [page_ids[start]]
+
+        def outlinks(page):
+            links = list()
+            if page < num_stored:
+                links = targets[offsets[page]:offsets[page + 1]].tolist()
+            return links + new_outlinks.get(page, list())
+
+        def link_weight(page):
+            num_links = len(new_outlinks.get(page, ()))
+            if page < num_stored:
+                num_links += int(offsets[page + 1] - offsets[page])
+            return 0 if num_links == 0 else (1 / num_links)
+
+        # the forward search from the start, and backward from the target.
+        # In the backward search, distances are to the target, and the
+        # page recorded for each is the one after it on the path.
+        page_weight = ({start: 0}, {target: 0})
+        previous = ({start: None}, {target: None})
+        queues = ([(0, start)], [(0, target)])
+        best, meeting = float('inf'), None
+        while len(queues[0]) > 0 and len(queues[1]) > 0:
+            # no path through the pages left can be any shorter
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            min_distance, min_page = heappop(queues[side])
+            # skip entries that a shorter path has replaced
+            if min_distance > page_weight[side][min_page]:
+                continue
+            if side == 0:
+                links = outlinks(min_page)
+            else:
+                start_link = in_offsets[min_page]
+                end_link = in_offsets[min_page + 1]
+                links = in_sources[start_link:end_link].tolist() + (
+                    new_inlinks.get(min_page, list())
+                )
+                # every inlink leads to min_page, so they weigh the same
+                weight = link_weight(min_page)
+            for neighbor in links:
+                if side == 0:
+                    weight = link_weight(neighbor)
+                new_dist = weight + min_distance
+                if neighbor not in page_weight[side] or (
+                    new_dist < page_weight[side][neighbor]
+                ):
+                    page_weight[side][neighbor] = new_dist
+                    previous[side][neighbor] = min_page
+                    heappush(queues[side], (new_dist, neighbor))
+                # this link joins the two searches
+                if neighbor in page_weight[1 - side]:
+                    total = (
+                        page_weight[side][neighbor] +
+                        page_weight[1 - side][neighbor]
+                    )
+                    if total < best:
+                        best, meeting = total, neighbor
+        if meeting is None:
+            return float('inf'), list()
+        # walk back to the start, then on to the target
+        path = list()
+        page = meeting
+        while page is not None:
+            path.append(page_ids[page])
+            page = previous[0][page]
+        path.reverse()
+        page = previous[1][meeting]
+        while page is not None:
+            path.append(page_ids[page])
+            page = previous[1][page]
+        return best, path
+
+
+def _first_occurrences(pages):
+    """Return the page indices in an array, without any repeats,
+       in the order each one first appears.
+
+    """
+    _, first = np.unique(pages, return_index=True)
+    return pages[np.sort(first)]
 
 if __name__ == "__main__":
     # Runner Script
@@ -466,7 +1402,7 @@ if __name__ == "__main__":
     print('Shortest distance neighbors 2 links away ' +
           f'from B: {neighbors}')
     # D: Finding Length of Shortest Path
-    b_to_d = internet.find_shortest_path('B', 'D')
-    print(f'Minimum weight of path from B to D: {b_to_d}')
+    b_to_d, path = internet.find_shortest_path('B', 'D')
+    print(f'Minimum weight of path from B to D: {b_to_d}, along {path}')
 
 
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class LinkMatrix:
+    """
+    A square matrix of the link weights in an InternetGraph, stored in
+    compressed sparse row (CSR) form. Row i holds the endorsements
+    received by the i-th PageVertex, and each column is the PageVertex
+    the endorsement came from. Only the links themselves are stored, so
+    the memory used grows with L, the number of links, not with P^2.
+
+    """
+    def __init__(self, indptr, indices, data, num_pages):
+        """Initialize attributes of a new LinkMatrix instance.
+
+           Parameters:
+           indptr(numpy.ndarray): P + 1 offsets, where row i is stored in
+                                  indices[indptr[i]:indptr[i + 1]]
+           indices(numpy.ndarray): the column (linking page) of each value
+           data(numpy.ndarray): the weight of each stored link
+           num_pages(int): P, the number of rows and columns
+
+           Returns: None
+
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = (num_pages, num_pages)
+        # np.add.reduceat can only be given the rows that hold values
+        self._filled_rows = np.flatnonzero(np.diff(indptr))
+        self._row_starts = indptr[:-1][self._filled_rows]
+
+    def __len__(self):
+        '''Return the number of links stored in the matrix.'''
+        return len(self.data)
+
+    def dot(self, vector):
+        """Return the product of this matrix and a vector.
+
+           Parameters:
+           vector(numpy.ndarray): a vector of length P, or a P x B block
+                                  of B vectors multiplied all at once
+
+           Returns: numpy.ndarray: the product, the same shape as vector
+
+           Complexity Analysis:
+           Each stored link is multiplied and added once, so this runs
+           in O(P + L) for a single vector.
+
+        """
+        weights = self.data if vector.ndim == 1 else self.data[:, None]
+        products = weights * vector[self.indices]
+        result = np.zeros(vector.shape, dtype=np.float64)
+        if len(self._row_starts) > 0:
+            # rows without links are skipped, so each sum runs to the next
+            # row that has one
+            result[self._filled_rows] = np.add.reduceat(
+                products, self._row_starts, axis=0
+            )
+        return result
@@ -0,0 +1,325 @@
+import os
+import time
+from multiprocessing import Process, Semaphore
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+# commands the workers read at the start of each step
+STEP, STOP = 1.0, 0.0
+# the most seconds to wait for the workers to finish a step
+STEP_TIMEOUT = 600.0
+# how often to check the workers are still running, in seconds
+POLL_INTERVAL = 0.1
+
+
+class ParallelRanker:
+    """
+    Runs PageRank's power iteration across several processes. The rows of
+    a LinkMatrix are split into one shard per worker, with about the same
+    number of links in each, and the matrix and the rankings are kept in
+    shared memory so no worker ever copies them. Each iteration, every
+    worker multiplies its own rows by the current rankings, and the
+    next iteration begins once all of them are done. If a worker stops,
+    or a step takes too long, the workers are shut down and a
+    RuntimeError is raised.
+
+    The workers are started once and kept for every call to rank, so use
+    a ParallelRanker as a context manager, or call close when done:
+
+        with ParallelRanker(internet.build_link_matrix()) as ranker:
+            rankings = ranker.rank(damping_factor=0.85)
+
+    """
+    def __init__(self, inlinks, num_workers=None, timeout=STEP_TIMEOUT):
+        """Share a LinkMatrix with a new pool of worker processes.
+
+           Parameters:
+           inlinks(LinkMatrix): the endorsements of each page, as
+                                returned by InternetGraph.build_link_matrix
+           num_workers(int): the number of processes to run. Defaults to
+                             the number of CPUs.
+           timeout(float): the most seconds to wait for the workers to
+                           finish a step
+
+           Returns: None
+
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        self.num_pages = inlinks.shape[0]
+        self.timeout = timeout
+        # how the last ranking converged
+        self.rank_iterations = 0
+        self.rank_residual = None
+        self._blocks = list()
+        self._arrays = dict()
+        self._workers = list()
+        try:
+            self._start(inlinks, num_workers)
+        except BaseException:
+            # don't leave any workers or shared memory behind
+            self._release(terminate=True)
+            raise
+
+    def _start(self, inlinks, num_workers):
+        '''Share the arrays with new workers, and start them.'''
+        num_pages = self.num_pages
+        for name, array in (
+            ('indptr', inlinks.indptr), ('indices', inlinks.indices),
+            ('data', inlinks.data),
+        ):
+            self._share(name, array.shape, array.dtype)[:] = array
+        # the current and next rankings take turns in the two rows
+        self._share('rankings', (2, num_pages), np.float64)
+        # the command, current row, damping factor and teleport of a step
+        self._share('control', (4,), np.float64)
+        # the L1 residual of each worker's rows
+        self._share('residuals', (num_workers,), np.float64)
+        # give each worker about the same number of links
+        bounds = np.searchsorted(
+            inlinks.indptr, np.linspace(0, len(inlinks), num_workers + 1)
+        )
+        bounds[0], bounds[-1] = 0, num_pages
+        bounds = np.minimum(np.maximum.accumulate(bounds), num_pages)
+        specs = {
+            name: (block.name, array.shape, array.dtype.str)
+            for (name, array), block in zip(self._arrays.items(), self._blocks)
+        }
+        # each worker waits on its own semaphore to start a step, and
+        # they all release the same one when it is done
+        self._steps = [Semaphore(0) for _ in range(num_workers)]
+        self._done = Semaphore(0)
+        for worker in range(num_workers):
+            process = Process(
+                target=_rank_shard,
+                args=(specs, int(bounds[worker]), int(bounds[worker + 1]),
+                      worker, self._steps[worker], self._done),
+                daemon=True
+            )
+            process.start()
+            self._workers.append(process)
+
+    def _share(self, name, shape, dtype):
+        '''Return a new array of zeros, backed by shared memory.'''
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        block = SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.fill(0)
+        self._arrays[name] = array
+        return array
+
+    def _run_step(self):
+        """Start a step on every worker, and wait for all of them to
+           finish it. If a worker stops, or the step takes longer than
+           the timeout, stop every worker, free the shared memory, and
+           raise a RuntimeError.
+
+        """
+        for step in self._steps:
+            step.release()
+        deadline = time.monotonic() + self.timeout
+        finished = 0
+        while finished < len(self._workers):
+            if self._done.acquire(timeout=POLL_INTERVAL):
+                finished += 1
+            elif any(not process.is_alive() for process in self._workers):
+                problem = 'stopped'
+                break
+            elif time.monotonic() > deadline:
+                problem = 'timed out'
+                break
+        else:
+            return None
+        workers = self._workers
+        self._release(terminate=True)
+        exit_codes = [process.exitcode for process in workers]
+        raise RuntimeError(
+            f'A PageRank worker {problem} (exit codes {exit_codes}).'
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def rank(self, damping_factor=1.0, tolerance=0.0, max_iterations=50,
+             dangling=None, initial=None):
+        """Return the rankings of every page, iterating in parallel.
+
+           After returning, the number of iterations that were run and
+           the L1 residual of the last one are stored in the
+           rank_iterations and rank_residual attributes.
+
+           Parameters:
+           damping_factor(float): the probability a visitor follows a link
+           tolerance(float): stop iterating once the L1 distance between
+                             two consecutive rankings is less than this
+           max_iterations(int): the most iterations to run
+           dangling(numpy.ndarray): True for each page without outlinks,
+                                    whose endorsement is shared evenly by
+                                    all pages. If None, it is lost.
+           initial(numpy.ndarray): the rankings to start from. If None,
+                                   every page starts at 1 / P.
+           (see InternetGraph.compute_inlink_values for more detail)
+
+           Returns:
+           numpy.ndarray: the rankings, as compute_inlink_values
+                          returns them
+
+           Complexity Analysis:
+           Each iteration takes O((P + L) / W) time across W workers,
+           plus O(P) in this process to share out the endorsement of
+           pages without outlinks.
+
+        """
+        if self._workers is None:
+            raise RuntimeError('This ParallelRanker has been closed.')
+        num_pages = self.num_pages
+        rankings = self._arrays['rankings']
+        control = self._arrays['control']
+        residuals = self._arrays['residuals']
+        current = 0
+        if initial is None:
+            rankings[current] = 1 / num_pages
+        else:
+            rankings[current] = initial
+        iterations, residual = 0, None
+        while iterations < max_iterations:
+            # endorsement every page receives from random jumps
+            teleport = (1 - damping_factor) / num_pages
+            if dangling is not None:
+                lost = rankings[current][dangling].sum()
+                teleport += damping_factor * lost / num_pages
+            control[:] = (STEP, current, damping_factor, teleport)
+            self._run_step()
+            residual = residuals.sum()
+            current = 1 - current
+            iterations += 1
+            if residual < tolerance:
+                break
+        self.rank_iterations, self.rank_residual = iterations, residual
+        return rankings[current].copy()
+
+    def close(self):
+        """Stop the workers and free the shared memory.
+
+           Parameters: None
+
+           Returns: None
+
+        """
+        if self._workers is None:
+            return None
+        self._arrays['control'][0] = STOP
+        for step in self._steps:
+            step.release()
+        self._release()
+        return None
+
+    def _release(self, terminate=False):
+        """Wait for the workers to exit, stopping any still running
+           after the timeout (or at once, if terminate is True), and free
+           the shared memory.
+
+        """
+        for process in self._workers:
+            if terminate is False:
+                process.join(self.timeout)
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        self._workers = None
+        self._arrays.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = list()
+
+
+def _rank_shard(specs, start, stop, worker, step, done):
+    """Compute the next rankings of the pages in rows start to stop,
+       once per step, until told to stop. Runs in a worker process.
+
+       Parameters:
+       specs(dict): the name, shape and dtype of each shared array
+       start(int): the first row of this worker's shard
+       stop(int): the row after the last row of this worker's shard
+       worker(int): the index of this worker
+       step(multiprocessing.Semaphore): released to start each step
+       done(multiprocessing.Semaphore): released at the end of each step
+
+       Returns: None
+
+    """
+    blocks, arrays = list(), dict()
+    for name, (block_name, shape, dtype) in specs.items():
+        block = SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _run_steps(arrays, start, stop, worker, step, done)
+    # the shared memory can only be closed once no arrays use it
+    arrays.clear()
+    for block in blocks:
+        block.close()
+    return None
+
+
+def _run_steps(arrays, start, stop, worker, step, done):
+    '''Run the steps of _rank_shard, over the arrays in shared memory.'''
+    indptr = arrays['indptr']
+    control, residuals = arrays['control'], arrays['residuals']
+    # the links of this shard, and where each row that holds any begins
+    first, last = indptr[start], indptr[stop]
+    indices = arrays['indices'][first:last]
+    data = arrays['data'][first:last]
+    filled_rows = np.flatnonzero(np.diff(indptr[start:stop + 1]))
+    row_starts = indptr[start:stop][filled_rows] - first
+    while True:
+        step.acquire()
+        if control[0] == STOP:
+            return None
+        current = int(control[1])
+        rankings = arrays['rankings'][current]
+        next_rankings = np.zeros(stop - start)
+        if len(row_starts) > 0:
+            next_rankings[filled_rows] = np.add.reduceat(
+                data * rankings[indices], row_starts
+            )
+        next_rankings *= control[2]
+        next_rankings += control[3]
+        residuals[worker] = np.abs(next_rankings - rankings[start:stop]).sum()
+        arrays['rankings'][1 - current][start:stop] = next_rankings
+        done.release()
+
+
+def rank_in_parallel(internet, num_workers=None, damping_factor=1.0,
+                     tolerance=0.0, max_iterations=50,
+                     redistribute_dangling=False, initial=None):
+    """Return the rankings of the pages in an InternetGraph, like
+       InternetGraph.compute_inlink_values, computed by a ParallelRanker.
+
+       Parameters:
+       internet(InternetGraph): the graph to rank
+       num_workers(int): the number of processes to run
+       (see InternetGraph.compute_inlink_values for the rest)
+
+       Returns:
+       numpy.ndarray: the rankings, in the order of internet.pages
+
+    """
+    inlinks = internet.build_link_matrix()
+    dangling = None
+    if redistribute_dangling is True:
+        dangling = internet.adjacency.out_degrees() == 0
+    with ParallelRanker(inlinks, num_workers) as ranker:
+        rankings = ranker.rank(
+            damping_factor, tolerance, max_iterations, dangling,
+            None if initial is None else internet._initial_rankings(initial)
+        )
+    internet.rank_iterations = ranker.rank_iterations
+    internet.rank_residual = ranker.rank_residual
+    return rankings
@@ -1,6 +1,12 @@
+import copy
+import os
+import tempfile
 import unittest
+import numpy as np
 from internet_graph import PageVertex, InternetGraph
+import blocked_rank
 import file_reader
+import parallel_rank
 
 
 class TestFileReader(unittest.TestCase):
@@ -29,6 +35,88 @@ class TestFileReader(unittest.TestCase):
             self.assertTrue(pageD.has_neighbor('A'))
             self.assertTrue(pageD.has_neighbor('B'))
 
+        def test_read_internet_graph_in_chunks(self):
+            """
+            The links are read the same way when the file is streamed
+            a few bytes at a time, and progress is reported as it goes.
+            """
+            whole = file_reader.read_internet_graph(
+                'test_files/large_input.txt'
+            )
+            reports = list()
+            chunked = file_reader.read_internet_graph(
+                'test_files/large_input.txt', chunk_size=5,
+                progress=lambda done, total: reports.append((done, total))
+            )
+            self.assertEqual(
+                list(chunked.adjacency.targets),
+                list(whole.adjacency.targets)
+            )
+            self.assertEqual(
+                list(chunked.adjacency.offsets),
+                list(whole.adjacency.offsets)
+            )
+            # the last report is of the whole file being read
+            self.assertEqual(reports[-1][0], reports[-1][1])
+
+        def test_binary_graph_round_trip(self):
+            """
+            An InternetGraph saved in the binary format is loaded back
+            with the same pages and links, and can't be changed.
+            """
+            internet = file_reader.read_internet_graph(
+                'test_files/large_input.txt'
+            )
+            with tempfile.TemporaryDirectory() as directory:
+                filename = os.path.join(directory, 'large_input.bin')
+                file_reader.write_binary_graph(
+                    internet, filename, include_weights=True
+                )
+                loaded = file_reader.read_binary_graph(filename)
+                self.assertEqual(list(loaded.pages), list(internet.pages))
+                self.assertEqual(
+                    list(loaded.adjacency.targets),
+                    list(internet.adjacency.targets)
+                )
+                # the arrays are stored little-endian on any machine
+                self.assertEqual(
+                    loaded.adjacency.targets.dtype, np.dtype('<i4')
+                )
+                self.assertEqual(loaded.rank_pages(), internet.rank_pages())
+                self.assertTrue(loaded.get_page('A').has_neighbor('C'))
+                with self.assertRaises(RuntimeError):
+                    loaded.link_pages('A', 'K')
+
+        def test_blocked_link_store(self):
+            """
+            Ranking from links split into partitions on disk, and streamed
+            a few at a time, matches ranking the whole graph in memory.
+            """
+            internet = file_reader.read_internet_graph(
+                'test_files/large_input.txt'
+            )
+            with tempfile.TemporaryDirectory() as directory:
+                store = blocked_rank.BlockedLinkStore.from_file(
+                    'test_files/large_input.txt', directory, num_blocks=3,
+                    chunk_size=7
+                )
+                self.assertEqual(store.page_ids(), list(internet.pages))
+                self.assertEqual(
+                    list(store.out_degrees),
+                    list(internet.adjacency.out_degrees())
+                )
+                for settings in (
+                    {},
+                    {'damping_factor': 0.85, 'tolerance': 1e-10,
+                     'max_iterations': 1000, 'redistribute_dangling': True},
+                ):
+                    expected = internet.compute_inlink_values(**settings)
+                    actual = store.rank(chunk_links=2, **settings)
+                    np.testing.assert_allclose(actual, expected, atol=1e-12)
+                    self.assertEqual(
+                        store.rank_iterations, internet.rank_iterations
+                    )
+
         def test_read_internet_graph_no_newline(self):
             """
             The file reader function throws an error if
@@ -69,6 +157,82 @@ class TestInternetGraphSmallInput(unittest.TestCase):
         }
         self.assertEqual(actual, expected)
 
+    def test_build_link_matrix(self):
+        '''Test the sparse matrix of endorsements between PageVertices.'''
+        internet = file_reader.read_internet_graph(
+            'test_files/small_input.txt'
+        )
+        inlinks = internet.build_link_matrix()
+        self.assertEqual(inlinks.shape, (4, 4))
+        self.assertEqual(len(inlinks), 7)
+        # A is endorsed by C and D, who each split their vote in two
+        actual = inlinks.dot(np.array([0, 0, 1, 1]))
+        expected = [1.0, 0.5, 0.0, 0.5]
+        self.assertEqual(list(actual), expected)
+
+    def test_get_inlinks(self):
+        '''Test the index of the pages linking to each PageVertex.'''
+        internet = file_reader.read_internet_graph(
+            'test_files/small_input.txt'
+        )
+        self.assertEqual(internet.get_inlinks('A'), ['C', 'D'])
+        self.assertEqual(internet.get_in_degree('C'), 1)
+        self.assertEqual(list(internet.adjacency.in_degrees()), [2, 2, 1, 2])
+        # the index follows changes to the links
+        internet.link_pages('A', 'C')
+        internet.unlink_pages('D', 'A')
+        self.assertEqual(internet.get_inlinks('A'), ['C'])
+        self.assertEqual(internet.get_inlinks('C'), ['A', 'B'])
+        with self.assertRaises(KeyError):
+            internet.get_inlinks('E')
+        # pages added without links join the index too
+        internet.add_page_by_id('E')
+        self.assertEqual(internet.get_inlinks('E'), [])
+        self.assertEqual(internet.get_in_degree('E'), 0)
+        self.assertEqual(internet.build_link_matrix().shape, (5, 5))
+
+    def test_compact_adjacency(self):
+        '''Test the links are stored as arrays of page indices.'''
+        internet = file_reader.read_internet_graph(
+            'test_files/small_input.txt'
+        )
+        # a repeated link is only stored once
+        internet.link_pages('A', 'B')
+        adjacency = internet.adjacency
+        adjacency.compact()
+        self.assertEqual(adjacency.page_ids, ['A', 'B', 'C', 'D'])
+        self.assertEqual(list(adjacency.offsets), [0, 1, 3, 5, 7])
+        self.assertEqual(list(adjacency.targets), [1, 2, 3, 0, 3, 0, 1])
+        # the pages are still offered as PageVertex-like objects
+        pageB = internet.get_page('B')
+        self.assertEqual(list(pageB.neighbors), ['C', 'D'])
+        self.assertEqual(pageB.link_weight, 0.5)
+        self.assertEqual(pageB, internet.pages['B'])
+
+    def test_read_links_before_compacting(self):
+        '''Test new links can be read without rebuilding the arrays.'''
+        internet = file_reader.read_internet_graph(
+            'test_files/small_input.txt'
+        )
+        adjacency = internet.adjacency
+        adjacency.compact()
+        targets = adjacency.targets
+        internet.link_pages('A', 'C')
+        internet.link_pages('A', 'B')
+        pageA = internet.get_page('A')
+        self.assertTrue(pageA.has_neighbor('C'))
+        self.assertFalse(pageA.has_neighbor('D'))
+        self.assertEqual(list(pageA.neighbors), ['B', 'C'])
+        self.assertEqual(pageA.link_weight, 0.5)
+        self.assertEqual(internet.get_inlinks('C'), ['A', 'B'])
+        self.assertEqual(internet.get_in_degree('B'), 2)
+        actual = internet.find_shortest_path('A', 'C', bidirectional=True)
+        self.assertEqual(actual, (0.5, ['A', 'C']))
+        # the links are still waiting in the buffer
+        self.assertIs(adjacency.targets, targets)
+        expected = internet.find_shortest_path('A', 'C')
+        self.assertEqual(actual, expected)
+
     def test_find_n_away(self):
         """
         Test neighbors found given a certain minimum distance away from a
@@ -81,6 +245,12 @@ class TestInternetGraphSmallInput(unittest.TestCase):
         actual = internet.find_pages_n_away(start_id, links)
         expected = ['A']
         self.assertEqual(actual, expected)
+        # no pages are a negative distance away, not even the start
+        self.assertEqual(internet.find_pages_n_away(start_id, -1), [])
+        self.assertEqual(internet.find_pages_n_away(start_id, 0), ['B'])
+        self.assertEqual(internet.find_pages_up_to_n_away(['B'], -2), [])
+        with self.assertRaises(KeyError):
+            internet.find_pages_n_away('E', -1)
 
     def test_shortest_path(self):
         """
@@ -91,9 +261,10 @@ class TestInternetGraphSmallInput(unittest.TestCase):
             'test_files/small_input.txt'
         )
         start, target = 'B', 'D'
-        actual = internet.find_shortest_path(start, target)
+        actual, path = internet.find_shortest_path(start, target)
         expected = 0.5
         self.assertEqual(actual, expected)
+        self.assertEqual(path, ['B', 'D'])
 
 
 class TestInternetGraphLargeInput(unittest.TestCase):
@@ -118,6 +289,234 @@ class TestInternetGraphLargeInput(unittest.TestCase):
         }
         self.assertEqual(actual, expected)
 
+    def test_rank_pages_damped(self):
+        """
+        Test the PageRank ratings given when random jumps are allowed,
+        and the pages without outlinks share their endorsement.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        actual = internet.rank_pages(
+            damping_factor=0.85, tolerance=1e-10, max_iterations=100,
+            redistribute_dangling=True
+        )
+        expected = {
+            1: ['H', 'F'],
+            2: ['C', 'D'],
+            3: ['B', 'A'],
+            4: ['E', 'K'],
+            5: ['G', 'I'],
+            6: ['J']
+        }
+        self.assertEqual(actual, expected)
+        # the iteration stops early, and no endorsement is lost
+        self.assertLess(internet.rank_iterations, 100)
+        self.assertLess(internet.rank_residual, 1e-10)
+        rankings = internet.compute_inlink_values(0.85, 1e-10, 100, True)
+        self.assertAlmostEqual(rankings.sum(), 1.0)
+
+    def test_rank_pages_warm_start(self):
+        """
+        Test starting from earlier rankings converges to the same rankings
+        in fewer iterations, after the InternetGraph has changed.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        settings = {
+            'damping_factor': 0.85, 'tolerance': 1e-10,
+            'max_iterations': 1000
+        }
+        rankings = internet.compute_inlink_values(**settings)
+        earlier = dict(zip(internet.pages, rankings))
+        internet.add_page_by_id('L')
+        internet.link_pages('L', 'A')
+        internet.link_pages('J', 'L')
+        expected = internet.compute_inlink_values(**settings)
+        cold_iterations = internet.rank_iterations
+        for initial in (earlier, rankings):
+            actual = internet.compute_inlink_values(
+                initial=initial, **settings
+            )
+            np.testing.assert_allclose(actual, expected, atol=1e-9)
+            self.assertLess(internet.rank_iterations, cold_iterations)
+
+    def test_rank_pages_solvers(self):
+        """
+        Test every PageRank solver converges to the same rankings, and
+        the accelerated ones in fewer iterations than power iteration.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        for redistribute in (False, True):
+            expected = internet.compute_inlink_values(
+                0.85, 1e-12, 1000, redistribute
+            )
+            power_iterations = internet.rank_iterations
+            for solver in ('gauss_seidel', 'extrapolation', 'adaptive'):
+                actual = internet.compute_inlink_values(
+                    0.85, 1e-12, 1000, redistribute, solver=solver
+                )
+                np.testing.assert_allclose(actual, expected, atol=1e-10)
+                self.assertLess(internet.rank_residual, 1e-12)
+                # the accelerated solvers need fewer iterations
+                if solver != 'adaptive':
+                    self.assertLess(internet.rank_iterations, power_iterations)
+        self.assertEqual(
+            internet.rank_pages(0.85, 1e-12, 1000, solver='gauss_seidel'),
+            internet.rank_pages(0.85, 1e-12, 1000)
+        )
+        with self.assertRaises(ValueError):
+            internet.compute_inlink_values(0.85, solver='newton')
+
+    def test_rank_in_parallel(self):
+        """
+        Test ranking with several worker processes matches ranking in
+        this process.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        for settings in (
+            {},
+            {'damping_factor': 0.85, 'tolerance': 1e-10,
+             'max_iterations': 1000, 'redistribute_dangling': True},
+        ):
+            expected = internet.compute_inlink_values(**settings)
+            iterations = internet.rank_iterations
+            actual = parallel_rank.rank_in_parallel(
+                internet, num_workers=3, **settings
+            )
+            np.testing.assert_allclose(actual, expected, atol=1e-12)
+            self.assertEqual(internet.rank_iterations, iterations)
+
+    def test_rank_in_parallel_worker_stops(self):
+        '''Test a worker stopping raises an error instead of hanging.'''
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        ranker = parallel_rank.ParallelRanker(
+            internet.build_link_matrix(), num_workers=2, timeout=5
+        )
+        worker = ranker._workers[0]
+        worker.terminate()
+        worker.join()
+        with self.assertRaises(RuntimeError):
+            ranker.rank(damping_factor=0.85)
+        # the other worker is stopped, and the shared memory freed
+        self.assertIsNone(ranker._workers)
+        self.assertEqual(ranker._blocks, [])
+        ranker.close()
+        with self.assertRaises(RuntimeError):
+            ranker.rank()
+
+    def test_bucket_rankings(self):
+        """
+        Test the arrays of ratings given straight from the rankings
+        vector, split both by position and by quantile.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        rankings = internet.compute_inlink_values()
+        order, ratings = internet.bucket_rankings(rankings, 4)
+        self.assertEqual(list(order), [7, 5, 2, 3, 1, 0, 4, 6, 8, 9, 10])
+        self.assertEqual(list(ratings), [2, 2, 1, 2, 3, 1, 3, 1, 3, 4, 4])
+        # pages with equal eigenvalues share a quantile
+        actual = internet.rank_pages(num_ratings=4, by_quantile=True)
+        expected = {
+            1: ['H', 'F', 'C'],
+            2: ['D', 'B', 'A', 'E'],
+            3: ['G'],
+            4: ['I', 'J', 'K']
+        }
+        self.assertEqual(actual, expected)
+
+    def test_personalized_rank(self):
+        """
+        Test the PageRank personalized to one seed page only reaches the
+        pages linked from it, and matches the exact scores.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        actual = internet.personalized_rank({'B': 1}, tolerance=1e-10)
+        self.assertEqual(set(actual), set('ABCDEFGH'))
+        self.assertAlmostEqual(actual['B'], 0.311311, places=6)
+        self.assertAlmostEqual(actual['H'], 0.125609, places=6)
+        self.assertAlmostEqual(sum(actual.values()), 1.0, places=6)
+
+    def test_personalized_rank_many(self):
+        """
+        Test a batch of personalized PageRanks matches computing each of
+        them alone, and that each stops iterating on its own.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        seed_sets = [{'B': 1}, {'J': 1}, {'A': 1, 'G': 3}]
+        actual = internet.personalized_rank_many(seed_sets, tolerance=1e-10)
+        self.assertEqual(actual.shape, (11, 3))
+        page_ids = list(internet.pages)
+        for column, seeds in enumerate(seed_sets):
+            expected = internet.personalized_rank(seeds, tolerance=1e-12)
+            for page_id, score in expected.items():
+                self.assertAlmostEqual(
+                    actual[page_ids.index(page_id), column], score, places=6
+                )
+        self.assertEqual(len(set(internet.rank_iterations)), 3)
+        # every seed set needs pages with some weight to jump back to
+        for seed_sets in ([{'A': 1}, {}], [{'B': 0}], [{'A': 1, 'G': -1}]):
+            with self.assertRaises(ValueError):
+                internet.personalized_rank_many(seed_sets)
+            with self.assertRaises(ValueError):
+                internet.personalized_rank(seed_sets[-1])
+        with self.assertRaises(KeyError):
+            internet.personalized_rank_many([{'A': 1}, {'Z': 1}])
+
+    def test_update_rankings(self):
+        """
+        Test updating the rankings after links change matches ranking the
+        changed InternetGraph from scratch.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        for redistribute in (False, True):
+            internet.compute_inlink_values(
+                damping_factor=0.85, tolerance=1e-12, max_iterations=1000,
+                redistribute_dangling=redistribute
+            )
+            internet.update_rankings(added_links=[('J', 'A')])
+            internet.unlink_pages('J', 'A')
+            internet.link_pages('J', 'A')
+            internet.link_pages('C', 'I')
+            actual = internet.update_rankings(
+                added_links=[('A', 'K'), ('B', 'J')],
+                removed_links=[('J', 'A'), ('C', 'I')]
+            )
+            # rank a copy, so the rankings of internet are still updated
+            expected = copy.deepcopy(internet).compute_inlink_values(
+                damping_factor=0.85, tolerance=1e-12, max_iterations=1000,
+                redistribute_dangling=redistribute
+            )
+            np.testing.assert_allclose(actual, expected, atol=1e-9)
+            internet.update_rankings(removed_links=[('A', 'K')])
+            targets = internet.adjacency.targets
+            actual = internet.update_rankings(added_links=[('A', 'K')])
+            # the new link didn't rebuild the adjacency arrays
+            self.assertIs(internet.adjacency.targets, targets)
+            expected = internet.compute_inlink_values(
+                damping_factor=0.85, tolerance=1e-12, max_iterations=1000,
+                redistribute_dangling=redistribute
+            )
+            np.testing.assert_allclose(actual, expected, atol=1e-9)
+            self.assertLess(internet.rank_residual, 1e-9)
+        with self.assertRaises(KeyError):
+            internet.unlink_pages('J', 'A')
+
     def test_find_n_away(self):
         """
         Test neighbors found given a certain minimum distance away from a
@@ -131,6 +530,23 @@ class TestInternetGraphLargeInput(unittest.TestCase):
         expected =['A', 'F', 'E', 'G', 'H']
         self.assertEqual(actual, expected)
 
+    def test_find_up_to_n_away(self):
+        """
+        Test the pages found at each distance from several starting
+        vertices at once.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        actual = internet.find_pages_up_to_n_away(['B', 'J'], 3)
+        expected = [
+            ['B', 'J'],
+            ['C', 'D', 'K'],
+            ['A', 'F', 'E', 'G', 'H'],
+            []
+        ]
+        self.assertEqual(actual, expected)
+
     def test_shortest_path(self):
         """
         Test the calculated total weight of shortest path
@@ -140,9 +556,52 @@ class TestInternetGraphLargeInput(unittest.TestCase):
             'test_files/large_input.txt'
         )
         start, target = 'B', 'D'
-        actual = internet.find_shortest_path(start, target)
+        actual, path = internet.find_shortest_path(start, target)
         expected = 0.2
         self.assertEqual(actual, expected)
+        self.assertEqual(path, ['B', 'D'])
+
+    def test_shortest_path_all_targets(self):
+        """
+        Test the shortest paths found to every reachable PageVertex,
+        and to one in a different connected component.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        distances, previous = internet.find_shortest_path('A')
+        self.assertEqual(distances['H'], 0.45)
+        self.assertEqual(previous['H'], 'D')
+        self.assertNotIn('K', distances)
+        actual = internet.find_shortest_path('A', 'K')
+        self.assertEqual(actual, (float('inf'), []))
+
+    def test_shortest_path_bidirectional(self):
+        """
+        Test the shortest paths found by searching from both ends
+        match those found by searching forward only.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/large_input.txt'
+        )
+        actual, path = internet.find_shortest_path(
+            'A', 'H', bidirectional=True
+        )
+        self.assertAlmostEqual(actual, 0.45)
+        self.assertEqual(path[0], 'A')
+        self.assertEqual(path[-1], 'H')
+        for target in ['B', 'D', 'H']:
+            expected, _ = internet.find_shortest_path('A', target)
+            actual, _ = internet.find_shortest_path(
+                'A', target, bidirectional=True
+            )
+            self.assertAlmostEqual(actual, expected)
+        actual = internet.find_shortest_path('A', 'K', bidirectional=True)
+        self.assertEqual(actual, (float('inf'), []))
+        # a page added after the inlinks were indexed can't be reached
+        internet.add_page_by_id('Z')
+        actual = internet.find_shortest_path('A', 'Z', bidirectional=True)
+        self.assertEqual(actual, (float('inf'), []))
 
 
 class TestInternetGraphExtraLargeInput(unittest.TestCase):
@@ -169,6 +628,18 @@ class TestInternetGraphExtraLargeInput(unittest.TestCase):
         }
         self.assertEqual(actual, expected)
 
+    def test_top_k_pages(self):
+        """
+        Test the highest ranked pages are found in order, with ties
+        broken by the order the pages were added in.
+        """
+        internet = file_reader.read_internet_graph(
+            'test_files/extra_large_input.txt'
+        )
+        actual = [page_id for page_id, _ in internet.top_k_pages(7)]
+        expected = ['U', '3', 'H', 'T', 'Z', 'Y', '1']
+        self.assertEqual(actual, expected)
+
     def test_find_n_away(self):
         """
         Test neighbors found given a certain minimum distance away from a
@@ -191,9 +662,10 @@ class TestInternetGraphExtraLargeInput(unittest.TestCase):
             'test_files/extra_large_input.txt'
         )
         start, target = 'B', 'D'
-        actual = internet.find_shortest_path(start, target)
+        actual, path = internet.find_shortest_path(start, target)
         expected = 0.16666666666666666
         self.assertEqual(actual, expected)
+        self.assertEqual(path, ['B', 'D'])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,552 @@
+import random
+import unittest
+from unittest import mock
+from pygraph.algorithms import pagerank as pagerank_module
+from pygraph.algorithms.minmax import (
+    minimal_spanning_tree_kruskal, minimal_spanning_tree_prim,
+    shortest_path, shortest_path_bidirectional
+)
+from pygraph.algorithms.utils import priority_queue
+from pygraph.classes import unionfind
+from pygraph.classes.digraph import digraph
+from pygraph.classes.exceptions import NodeUnreachable
+from pygraph.classes.graph import graph as undirected_graph
+
+
+def make_graph(graph, edges, nodes=()):
+    """Add the given nodes, and each edge with its nodes, to a graph.
+       An edge is (u, v) or (u, v, weight).
+
+    """
+    for node in nodes:
+        graph.add_node(node)
+    for edge in edges:
+        for node in edge[:2]:
+            if not graph.has_node(node):
+                graph.add_node(node)
+        graph.add_edge(edge[:2], wt=edge[2] if len(edge) > 2 else 1)
+    return graph
+
+
+class TestDigraph(unittest.TestCase):
+    """
+    Test suite for the degree and weight counters of pygraph digraphs.
+    """
+    def assertCounters(self, graph):
+        '''Assert the counters of a digraph match its edges.'''
+        for node in graph.nodes():
+            self.assertEqual(
+                graph.out_degree(node), len(graph.neighbors(node))
+            )
+            self.assertEqual(
+                graph.in_degree(node), len(graph.incidents(node))
+            )
+            self.assertEqual(graph.out_weight(node), sum(
+                graph.edge_weight((node, other))
+                for other in graph.neighbors(node)
+            ))
+        nodes = graph.nodes()
+        self.assertEqual(
+            list(graph.out_degrees()),
+            [graph.out_degree(node) for node in nodes]
+        )
+        self.assertEqual(
+            list(graph.in_degrees()),
+            [graph.in_degree(node) for node in nodes]
+        )
+        self.assertEqual(
+            list(graph.out_weights()),
+            [graph.out_weight(node) for node in nodes]
+        )
+
+    def test_counters(self):
+        """
+        Test the counters follow edges being added, reweighted and
+        deleted, and nodes being deleted.
+        """
+        graph = make_graph(digraph(), [
+            ('a', 'b', 2), ('a', 'c', 3), ('b', 'c', 1), ('c', 'a', 5),
+            ('d', 'a', 4),
+        ])
+        self.assertEqual(graph.out_weight('a'), 5)
+        self.assertEqual(graph.in_degree('a'), 2)
+        self.assertCounters(graph)
+        graph.set_edge_weight(('a', 'b'), 7)
+        self.assertEqual(graph.out_weight('a'), 10)
+        graph.set_edge_properties(('a', 'b'), weight=10)
+        self.assertEqual(graph.out_weight('a'), 13)
+        graph.set_edge_properties(('a', 'b'), label='ab')
+        self.assertEqual(graph.out_weight('a'), 13)
+        self.assertCounters(graph)
+        graph.del_edge(('a', 'c'))
+        self.assertEqual(graph.out_weight('a'), 10)
+        self.assertEqual(graph.in_degree('c'), 1)
+        self.assertCounters(graph)
+        graph.del_node('a')
+        self.assertEqual(graph.out_degree('d'), 0)
+        self.assertEqual(graph.out_weight('d'), 0)
+        self.assertEqual(graph.in_degree('b'), 0)
+        self.assertCounters(graph)
+        self.assertEqual(list(graph.out_degrees(['c', 'b'])), [0, 1])
+        with self.assertRaises(ValueError):
+            graph.del_edge(('b', 'd'))
+
+
+class TestPriorityQueue(unittest.TestCase):
+    """
+    Test suite for the indexed heap of priority_queue.
+    """
+    def test_bulk_construction(self):
+        """
+        Test a queue built from many items pops them in order of
+        priority, keeping the lowest priority of a repeated item.
+        """
+        queue = priority_queue(
+            ['a', 'b', 'c', 'b', 'd'], priorities=[3, 5, 1, 2, 4]
+        )
+        self.assertEqual(len(queue), 4)
+        self.assertEqual(queue.priority('b'), 2)
+        self.assertEqual(queue.peek(), 'c')
+        self.assertEqual(
+            [queue.pop() for _ in range(len(queue))], ['c', 'b', 'a', 'd']
+        )
+        self.assertTrue(queue.empty())
+        # without priorities, every item starts at 0
+        queue = priority_queue(['x', 'y', 'x'])
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.priority('y'), 0)
+
+    def test_bulk_construction_tuples(self):
+        """
+        Test a queue can be built from tuple priorities, as insert takes
+        them, and from items that can't be compared with each other.
+        """
+        queue = priority_queue(['a', 'b'], priorities=[(1, 2), (0, 5)])
+        self.assertEqual(queue.priority('a'), (1, 2))
+        self.assertEqual([queue.pop(), queue.pop()], ['b', 'a'])
+        queue = priority_queue(
+            [frozenset('x'), 1, 'y', None],
+            priorities=[(0, 1), (0, 1), (2, 0), (2, 0)]
+        )
+        self.assertEqual(
+            {queue.pop(), queue.pop()}, {frozenset('x'), 1}
+        )
+        self.assertEqual(len(queue), 2)
+
+    def test_change_priority(self):
+        """
+        Test inserting a queued item changes its priority, and
+        decrease_key only lowers it.
+        """
+        queue = priority_queue()
+        for item, priority in (('a', 4), ('b', 2), ('c', 6), ('d', 8)):
+            queue.insert(item, priority)
+        queue.insert('a', 9)
+        self.assertEqual(len(queue), 4)
+        self.assertEqual(queue.peek(), 'b')
+        queue.decrease_key('d', 1)
+        self.assertEqual(queue.peek(), 'd')
+        self.assertEqual(queue.priority('d'), 1)
+        with self.assertRaises(ValueError):
+            queue.decrease_key('b', 3)
+        self.assertEqual(
+            [queue.pop() for _ in range(len(queue))], ['d', 'b', 'c', 'a']
+        )
+
+    def test_discard(self):
+        '''Test discarded items leave the queue, and others keep order.'''
+        queue = priority_queue(range(10), priorities=range(10, 0, -1))
+        queue.discard(3)
+        queue.discard(9)
+        queue.discard(42)
+        self.assertNotIn(3, queue)
+        self.assertIn(4, queue)
+        self.assertEqual(
+            [queue.pop() for _ in range(len(queue))],
+            [8, 7, 6, 5, 4, 2, 1, 0]
+        )
+
+    def test_random_operations(self):
+        '''Test random operations against a dict of the priorities.'''
+        generator = random.Random(5)
+        queue, expected = priority_queue(), dict()
+        for _ in range(2000):
+            item = generator.randrange(50)
+            action = generator.random()
+            if action < 0.4:
+                priority = generator.randrange(100)
+                queue.insert(item, priority)
+                expected[item] = priority
+            elif action < 0.6 and item in expected:
+                priority = generator.randrange(expected[item] + 1)
+                queue.decrease_key(item, priority)
+                expected[item] = priority
+            elif action < 0.8:
+                queue.discard(item)
+                expected.pop(item, None)
+            elif len(expected) > 0:
+                lowest = min(expected.values())
+                self.assertEqual(expected.pop(queue.pop()), lowest)
+            self.assertEqual(len(queue), len(expected))
+        for item, priority in expected.items():
+            self.assertEqual(queue.priority(item), priority)
+
+
+class TestUnionFind(unittest.TestCase):
+    """
+    Test suite for the batch methods of UnionFind.
+    """
+    def partition(self, roots):
+        '''Return the set of elements in each component, by their roots.'''
+        components = dict()
+        for element, root in enumerate(roots):
+            components.setdefault(root, set()).add(element)
+        return sorted(sorted(component) for component in components.values())
+
+    def check_batch(self):
+        '''Compare union_many with union over many random pairs.'''
+        generator = random.Random(11)
+        for _ in range(30):
+            n = generator.randint(1, 200)
+            pairs = [
+                (generator.randrange(n), generator.randrange(n))
+                for _ in range(generator.randint(0, 2 * n))
+            ]
+            expected = unionfind.UnionFind(n)
+            for p, q in pairs:
+                expected.union(p, q)
+            # join the pairs in two batches, with a union between them
+            actual = unionfind.UnionFind(n)
+            half = len(pairs) // 2
+            actual.union_many(pairs[:half])
+            if pairs:
+                actual.union(*pairs[-1])
+            actual.union_many(pairs[half:])
+            roots = list(actual.components())
+            self.assertEqual(
+                self.partition(roots),
+                self.partition([expected._root(i) for i in range(n)])
+            )
+            self.assertEqual(roots, list(actual.find_roots(range(n))))
+            sizes = list(actual.component_sizes())
+            self.assertEqual(
+                sizes, [roots.count(root) for root in roots]
+            )
+            self.assertEqual(sizes, [
+                expected.component_size(i) for i in range(n)
+            ])
+            if n > 1:
+                self.assertEqual(
+                    actual.find(0, n - 1), expected.find(0, n - 1)
+                )
+
+    def test_union_many(self):
+        '''Test the batch methods join the same components as union.'''
+        self.check_batch()
+
+    def test_one_storage(self):
+        """
+        Test the scalar and batch methods see each other's changes in
+        the same arrays, which are never swapped for another form.
+        """
+        union_find = unionfind.UnionFind(6)
+        parents = union_find._id
+        union_find.union(0, 1)
+        self.assertEqual(
+            list(union_find.component_sizes([0, 1, 2])), [2, 2, 1]
+        )
+        union_find.union_many([(2, 3), (3, 1)])
+        self.assertEqual(union_find.component_size(2), 4)
+        self.assertTrue(union_find.find(0, 3))
+        self.assertFalse(union_find.find(0, 4))
+        self.assertIs(union_find._id, parents)
+
+    def test_union_many_without_numpy(self):
+        '''Test the batch methods also work without NumPy.'''
+        with mock.patch.object(unionfind, 'numpy', None):
+            self.check_batch()
+
+
+class TestSpanningTree(unittest.TestCase):
+    """
+    Test suite for the minimal spanning trees of pygraph graphs.
+    """
+    def make_forest(self):
+        '''Return a graph of two connected components.'''
+        return make_graph(undirected_graph(), [
+            ('a', 'b', 1), ('b', 'c', 2), ('a', 'c', 3), ('c', 'd', 1),
+            ('b', 'd', 4), ('e', 'f', 5),
+        ])
+
+    def test_prim_root(self):
+        '''Test the tree grown from a root only spans its component.'''
+        graph = self.make_forest()
+        actual = minimal_spanning_tree_prim(graph, root='a')
+        expected = {'a': None, 'b': 'a', 'c': 'b', 'd': 'c'}
+        self.assertEqual(actual, expected)
+        actual = minimal_spanning_tree_prim(graph, root='f')
+        self.assertEqual(actual, {'f': None, 'e': 'f'})
+
+    def test_prim_forest(self):
+        '''Test a tree is grown in each component without a root.'''
+        graph = self.make_forest()
+        actual = minimal_spanning_tree_prim(graph)
+        expected = {
+            'a': None, 'b': 'a', 'c': 'b', 'd': 'c', 'e': None, 'f': 'e'
+        }
+        self.assertEqual(actual, expected)
+
+    def test_kruskal(self):
+        """
+        Test Kruskal's algorithm hangs the same trees from the same
+        roots as Prim's algorithm.
+        """
+        graph = self.make_forest()
+        for root in ('a', 'f', None):
+            self.assertEqual(
+                minimal_spanning_tree_kruskal(graph, root=root),
+                minimal_spanning_tree_prim(graph, root=root)
+            )
+
+    def test_random_spanning_trees(self):
+        '''Test both algorithms find forests of the same weight.'''
+        generator = random.Random(7)
+        for _ in range(20):
+            num_nodes = generator.randint(1, 30)
+            edges = set()
+            for _ in range(generator.randint(0, 60)):
+                u = generator.randrange(num_nodes)
+                v = generator.randrange(num_nodes)
+                if u != v and (v, u) not in edges:
+                    edges.add((u, v))
+            graph = make_graph(undirected_graph(), [
+                (u, v, generator.randint(1, 9)) for u, v in sorted(edges)
+            ], nodes=range(num_nodes))
+            weights = list()
+            for find_tree in (
+                minimal_spanning_tree_prim, minimal_spanning_tree_kruskal
+            ):
+                tree = find_tree(graph)
+                self.assertEqual(set(tree), set(graph.nodes()))
+                tree_edges = [
+                    (node, parent) for node, parent in tree.items()
+                    if parent is not None
+                ]
+                for edge in tree_edges:
+                    self.assertIn(edge[1], graph.neighbors(edge[0]))
+                weights.append(
+                    sum(graph.edge_weight(edge) for edge in tree_edges)
+                )
+            self.assertEqual(weights[0], weights[1])
+
+
+class TestShortestPath(unittest.TestCase):
+    """
+    Test suite for the point-to-point shortest paths of pygraph graphs.
+    """
+    def test_bidirectional_digraph(self):
+        '''Test the path follows the direction of the edges.'''
+        graph = make_graph(digraph(), [
+            ('a', 'b', 1), ('b', 'c', 1), ('c', 'd', 1), ('a', 'd', 5),
+            ('d', 'a', 1), ('b', 'e', 4), ('e', 'd', 0),
+        ])
+        self.assertEqual(
+            shortest_path_bidirectional(graph, 'a', 'd'),
+            (3, ['a', 'b', 'c', 'd'])
+        )
+        self.assertEqual(
+            shortest_path_bidirectional(graph, 'd', 'c'),
+            (3, ['d', 'a', 'b', 'c'])
+        )
+        self.assertEqual(shortest_path_bidirectional(graph, 'e', 'e'), (
+            0, ['e']
+        ))
+
+    def test_bidirectional_unreachable(self):
+        '''Test an unreachable target raises NodeUnreachable.'''
+        graph = make_graph(digraph(), [('a', 'b'), ('c', 'b')], nodes=['d'])
+        with self.assertRaises(NodeUnreachable):
+            shortest_path_bidirectional(graph, 'b', 'a')
+        with self.assertRaises(NodeUnreachable):
+            shortest_path_bidirectional(graph, 'a', 'c')
+        with self.assertRaises(NodeUnreachable):
+            shortest_path_bidirectional(graph, 'a', 'd')
+
+    def test_bidirectional_random(self):
+        """
+        Test the distances match Dijkstra's algorithm from the source
+        in random graphs and digraphs.
+        """
+        generator = random.Random(3)
+        for trial in range(40):
+            graph = digraph() if trial % 2 else undirected_graph()
+            num_nodes = generator.randint(2, 20)
+            graph.add_nodes(range(num_nodes))
+            for _ in range(generator.randint(0, 50)):
+                u = generator.randrange(num_nodes)
+                v = generator.randrange(num_nodes)
+                if u != v and not graph.has_edge((u, v)):
+                    graph.add_edge((u, v), wt=generator.randint(0, 9))
+            source = generator.randrange(num_nodes)
+            target = generator.randrange(num_nodes)
+            _, distances = shortest_path(graph, source)
+            if target not in distances:
+                with self.assertRaises(NodeUnreachable):
+                    shortest_path_bidirectional(graph, source, target)
+                continue
+            distance, path = shortest_path_bidirectional(
+                graph, source, target
+            )
+            self.assertEqual(distance, distances[target])
+            self.assertEqual((path[0], path[-1]), (source, target))
+            self.assertEqual(distance, sum(
+                graph.edge_weight(edge) for edge in zip(path, path[1:])
+            ))
+
+
+class TestPageRank(unittest.TestCase):
+    """
+    Test suite for the PageRank of pygraph digraphs.
+    """
+    def test_pagerank_arrays_match_loop(self):
+        """
+        Test the PageRank found over NumPy arrays matches the PageRank
+        found by the loop over the links, at any min_delta.
+        """
+        graph = make_graph(digraph(), [
+            ('A', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'A'), ('D', 'C'),
+            ('D', 'E'), ('E', 'A'),
+        ], nodes=['F'])
+        for min_delta in (0.1, 1e-3, 1e-10):
+            expected = pagerank_module.pagerank(graph, min_delta=min_delta)
+            with mock.patch.object(pagerank_module, 'numpy', None):
+                actual = pagerank_module.pagerank(graph, min_delta=min_delta)
+            self.assertEqual(list(actual), list(expected))
+            for node in graph.nodes():
+                self.assertAlmostEqual(actual[node], expected[node], places=12)
+
+
+    def test_personalized_pagerank(self):
+        """
+        Test the PageRank personalized to two seeds matches the exact
+        values, with the value reaching a node without outbound links
+        sent back to the seeds, and that unknown seeds are refused.
+        """
+        graph = make_graph(digraph(), [
+            ('A', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'A'), ('C', 'D'),
+            ('E', 'A'),
+        ])
+        seeds, damping_factor = {'A': 1, 'B': 3}, 0.85
+        actual = pagerank_module.personalized_pagerank(
+            graph, seeds, damping_factor, min_residual=1e-12
+        )
+        # E can't be reached from the seeds
+        self.assertEqual(set(actual), set('ABCD'))
+        # solve x = (1 - d) t + d M x, where each column of M spreads a
+        # node's value over its outbound links, or over t for D
+        nodes = ['A', 'B', 'C', 'D', 'E']
+        teleport = [0.25, 0.75, 0, 0, 0]
+        columns = dict((node, [0.0] * 5) for node in nodes)
+        for node in nodes:
+            neighbors = graph.neighbors(node)
+            for neighbor in neighbors:
+                columns[node][nodes.index(neighbor)] = 1.0 / len(neighbors)
+            if not neighbors:
+                columns[node] = list(teleport)
+        # iterate the equation until it has converged far past places=9
+        expected = list(teleport)
+        for _ in range(500):
+            expected = [
+                (1 - damping_factor) * teleport[row] + damping_factor * sum(
+                    columns[node][row] * expected[column]
+                    for column, node in enumerate(nodes)
+                )
+                for row in range(5)
+            ]
+        for column, node in enumerate(nodes[:4]):
+            self.assertAlmostEqual(actual[node], expected[column], places=9)
+        self.assertAlmostEqual(sum(actual.values()), 1.0, places=9)
+        with self.assertRaises(KeyError):
+            pagerank_module.personalized_pagerank(graph, {'A': 1, 'Z': 1})
+
+    def test_top_k_nodes(self):
+        """
+        Test the highest ranked nodes come in descending order, with
+        ties kept in the order of the dict, and that asking for more
+        nodes than there are returns all of them.
+        """
+        ranks = {'a': 0.1, 'b': 0.3, 'c': 0.2, 'd': 0.3, 'e': 0.05, 'f': 0.2}
+        top_k_nodes = pagerank_module.top_k_nodes
+        self.assertEqual(top_k_nodes(ranks, 3), [
+            ('b', 0.3), ('d', 0.3), ('c', 0.2),
+        ])
+        self.assertEqual(top_k_nodes(ranks, 4)[-1], ('f', 0.2))
+        self.assertEqual(top_k_nodes(ranks, 0), [])
+        expected = sorted(ranks.items(), key=lambda item: -item[1])
+        self.assertEqual(top_k_nodes(ranks, 10), expected)
+        self.assertEqual(top_k_nodes({}, 2), [])
+
+    def test_pagerank_warm_start(self):
+        """
+        Test starting from a converged PageRank takes fewer iterations
+        to reach the same values, and how the starting values are
+        filled in for new nodes and cleared of stale ones.
+        """
+        graph = make_graph(digraph(), [
+            ('A', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'A'), ('D', 'C'),
+        ])
+        iterations = []
+        power_solver = pagerank_module.power_solver
+
+        def counting_solver(*args):
+            result = power_solver(*args)
+            iterations.append(result[1])
+            return result
+
+        with mock.patch.dict(pagerank_module.SOLVERS, power=counting_solver):
+            expected = pagerank_module.pagerank(graph, min_delta=1e-10)
+            actual = pagerank_module.pagerank(
+                graph, min_delta=1e-10, initial=expected
+            )
+        self.assertLess(iterations[1], iterations[0])
+        for node in graph.nodes():
+            self.assertAlmostEqual(actual[node], expected[node], places=9)
+        # D is missing, so starts at a quarter of the total, and Z is
+        # no longer in the graph, so the rest are scaled up to the total
+        initial = {'A': 0.5, 'B': 0.1, 'C': 0.2, 'Z': 0.2}
+        for numpy in (pagerank_module.numpy, None):
+            with mock.patch.object(pagerank_module, 'numpy', numpy):
+                start = pagerank_module.pagerank(
+                    graph, max_iterations=0, initial=initial
+                )
+            for node, value in (('A', 0.5), ('C', 0.2), ('D', 0.25)):
+                self.assertAlmostEqual(start[node], value / 1.05)
+            self.assertAlmostEqual(sum(start.values()), 1.0)
+
+    def test_pagerank_solver_names(self):
+        """
+        Test unknown solvers are refused on both paths, and so are
+        solvers the loop over the links can't run.
+        """
+        graph = make_graph(digraph(), [('A', 'B'), ('B', 'A'), ('B', 'C')])
+        expected = pagerank_module.pagerank(graph, min_delta=1e-10)
+        actual = pagerank_module.pagerank(
+            graph, min_delta=1e-10, solver='gauss_seidel'
+        )
+        for node in graph.nodes():
+            self.assertAlmostEqual(actual[node], expected[node], places=8)
+        with self.assertRaises(ValueError):
+            pagerank_module.pagerank(graph, solver='bogus')
+        with mock.patch.object(pagerank_module, 'numpy', None):
+            with self.assertRaises(ValueError):
+                pagerank_module.pagerank(graph, solver='bogus')
+            with self.assertRaises(ValueError):
+                pagerank_module.pagerank(graph, solver='gauss_seidel')
+            pagerank_module.pagerank(graph, solver='power')
+        undirected = make_graph(undirected_graph(), [('A', 'B')])
+        with self.assertRaises(ValueError):
+            pagerank_module.pagerank(undirected, solver='adaptive')
+
+
+if __name__ == "__main__":
+    unittest.main()